@@ -0,0 +1,46 @@
+########################################
+# to run this benchmark:
+# python bench_import.py [repeat]
+#
+# times importing each peanut module in a fresh interpreter, and lists which heavy
+# dependencies (NumPy, scikit-bio, SciPy, pandas, multiprocessing) each import loads
+#
+# that the light modules load none of them is checked by tests/test_imports.py
+########################################
+
+import subprocess
+import sys
+
+MODULES = ['peanut.calculate_protein_constants', 'peanut.cache', 'peanut.cli', 'peanut.codon_table',
+           'peanut.mutant_set', 'peanut.convert_dna_to_aa', 'peanut.primer_design']
+HEAVY = ['numpy', 'skbio', 'scipy', 'pandas', 'multiprocessing']
+
+PROBE = """
+import sys, time
+start = time.perf_counter()
+import %s
+elapsed = time.perf_counter() - start
+print(elapsed)
+print(' '.join(name for name in %r if name in sys.modules))
+"""
+
+def import_time(module, repeat):
+    """
+    Returns the best import time of module over repeat fresh interpreters, and the
+    heavy dependencies it loaded
+    """
+    best = None
+    for _ in range(repeat):
+        output = subprocess.check_output([sys.executable, '-c', PROBE % (module, HEAVY)]).decode()
+        elapsed, loaded = output.split('\n')[:2]
+        if best is None or float(elapsed) < best:
+            best = float(elapsed)
+    return best, loaded.split()
+
+repeat = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+baseline, loaded = import_time('os', repeat)
+
+print("%-36s %10s   %s" % ("module", "import (ms)", "heavy dependencies loaded"))
+for module in MODULES:
+    elapsed, loaded = import_time(module, repeat)
+    print("%-36s %10.1f   %s" % (module, 1000*(elapsed - baseline), " ".join(loaded) or "-"))
@@ -0,0 +1,51 @@
+########################################
+# to run this benchmark:
+# python bench_translation.py
+#
+# times peanut's codon table translation against scikit-bio genetic_code(11),
+# on the constructs in nucleotide_sequences/ and on random sequences of growing
+# length, and checks both give the same amino acid sequence
+########################################
+
+from peanut.codon_table import translate
+import glob
+import os.path
+import random
+import timeit
+
+try:
+    from skbio.sequence import genetic_code
+except ImportError:
+    genetic_code = None
+
+def skbio_translate(sequence):
+    # as dna_to_aa() did: build the code object on every call
+    return genetic_code(11).translate(sequence).sequence
+
+def best_time(function, sequence, repeat=5):
+    number = max(1, 100000 // max(1, len(sequence)))
+    return min(timeit.repeat(lambda: function(sequence), number=number, repeat=repeat)) / number
+
+here = os.path.dirname(os.path.abspath(__file__))
+sequences = []
+for filename in sorted(glob.glob(os.path.join(here, '..', 'nucleotide_sequences', '*'))):
+    if filename.endswith('.md'):
+        continue
+    with open(filename, 'r') as fi:
+        sequences.append((os.path.basename(filename), fi.readline().strip()))
+random.seed(0)
+for length in [300, 3000, 30000, 300000]:
+    sequences.append(("random_%d" % length, ''.join(random.choice('acgt') for _ in range(length))))
+
+print("%-28s %8s %12s %12s %8s" % ("sequence", "length", "peanut (s)", "skbio (s)", "speedup"))
+for name, sequence in sequences:
+    peanut_time = best_time(translate, sequence)
+    if genetic_code is None:
+        print("%-28s %8d %12.3e %12s %8s" % (name, len(sequence), peanut_time, "-", "-"))
+        continue
+    if skbio_translate(sequence) != translate(sequence):
+        raise ValueError("translations differ for "+name)
+    skbio_time = best_time(skbio_translate, sequence)
+    print("%-28s %8d %12.3e %12.3e %7.1fx" % (name, len(sequence), peanut_time, skbio_time, skbio_time/peanut_time))
+if genetic_code is None:
+    print("\nscikit-bio not found; only peanut timings shown")
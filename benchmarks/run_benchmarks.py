@@ -0,0 +1,182 @@
+########################################
+# to run the benchmarks:
+# python run_benchmarks.py [--filter text] [--save] [--baseline filename] [--tolerance 1.5]
+#
+# times dna_to_aa (fixed frame and try_frames), single, double and triple mutant
+# enumeration, PrimerGenerator.make_single_mutant and saturation_library (greedy and
+# all-windows primer placement) and the calculate_protein_constants functions on the
+# constructs in nucleotide_sequences/ and on random sequences of growing length, and
+# measures the peak memory each one allocates with tracemalloc
+#
+# results are compared against baseline.json next to this script: the run fails
+# (exit status 1) if any benchmark is slower, or allocates more, than the baseline by
+# more than the tolerance factor. --save writes the results as the new baseline.
+# timings only compare on the machine the baseline was saved on
+########################################
+
+import argparse
+import json
+import os.path
+import platform
+import random
+import sys
+import timeit
+import tracemalloc
+
+import numpy as np
+
+from peanut.calculate_protein_constants import calculate_absorbance, calculate_constants_batch
+from peanut.calculate_protein_constants import calculate_extinction_coeff, calculate_molecular_weight
+from peanut.calculate_protein_constants import calculate_mutant_constants
+from peanut.convert_dna_to_aa import dna_to_aa, two_dna_point_mutants_to_aa
+from peanut.convert_dna_to_aa import all_dna_point_mutants_to_aa, iter_point_mutants_to_aa, point_mutants_to_aa
+from peanut.primer_design import PrimerConstraints, PrimerGenerator
+from peanut.seqio import read_sequence
+
+here = os.path.dirname(os.path.abspath(__file__))
+default_baseline = os.path.join(here, 'baseline.json')
+
+def constructs():
+    """
+    Real constructs and random sequences, as (name, nucleotide sequence)
+    """
+    sequences = []
+    for name in ['Abl', 'EGFR', '1_YopH_orf']:
+        sequences.append((name, read_sequence(os.path.join(here, '..', 'nucleotide_sequences', name+'.txt'))))
+    random_state = random.Random(0)
+    for length in [300, 3000, 30000]:
+        # random codons, avoiding stops so the sequence reads as one protein
+        codons = [codon for codon in (a+b+c for a in 'ACGT' for b in 'ACGT' for c in 'ACGT')
+                  if codon not in ['TAA', 'TAG', 'TGA']]
+        sequences.append(("random_%d" % length, "".join(random_state.choice(codons) for _ in range(length//3))))
+    return sequences
+
+def benchmarks():
+    """
+    Every benchmark, as (name, function of no arguments)
+    """
+    cases = []
+    for name, sequence in constructs():
+        length = len(sequence)
+        cases.append(("dna_to_aa/%s" % name, lambda sequence=sequence: dna_to_aa(sequence)))
+        cases.append(("dna_to_aa_try_frames/%s" % name,
+                      lambda sequence=sequence: dna_to_aa(sequence, try_frames=True)))
+        if length <= 3000:
+            cases.append(("single_mutants/%s" % name, lambda sequence=sequence: all_dna_point_mutants_to_aa(sequence)))
+        if length <= 1500:
+            cases.append(("double_mutants/%s" % name, lambda sequence=sequence: two_dna_point_mutants_to_aa(sequence)))
+            cases.append(("double_mutants_compact/%s" % name,
+                          lambda sequence=sequence: two_dna_point_mutants_to_aa(sequence, compact=True)))
+
+        aa_sequence = dna_to_aa(sequence)
+        cases.append(("constants/%s" % name, lambda aa_sequence=aa_sequence: (
+            calculate_extinction_coeff(aa_sequence, verbose=False), calculate_molecular_weight(aa_sequence),
+            calculate_absorbance(aa_sequence))))
+
+    # primers: a panel of mutations spread over the Abl kinase domain
+    abl = read_sequence(os.path.join(here, '..', 'nucleotide_sequences', 'Abl.txt'))
+    generator = PrimerGenerator(abl, first_res=242)
+    mutants = [(residue, k+242, 'A' if residue != 'A' else 'G')
+               for k, residue in enumerate(generator.aa_sequence) if residue != '*'][::10]
+
+    def make_primers():
+        for wt_res, res_num, mut_res in mutants:
+            generator._design_primers(wt_res, res_num, mut_res, verbose=False)
+    cases.append(("make_single_mutant/Abl_panel_%d" % len(mutants), make_primers))
+    cases.append(("PrimerGenerator/Abl", lambda: PrimerGenerator(abl, first_res=242)))
+    # every residue to every amino acid, growing one window per primer or scoring all windows
+    cases.append(("saturation_library/Abl", lambda: generator.saturation_library()))
+    cases.append(("saturation_library_windows/Abl",
+                  lambda: generator.saturation_library(constraints=PrimerConstraints())))
+
+    # triple mutants of the first 50 codons, walked one at a time and as a MutantSet
+    abl_50 = abl[:150]
+    cases.append(("triple_mutants_iter/Abl_50",
+                  lambda: sum(1 for _ in iter_point_mutants_to_aa(abl_50, 3, deltas=True))))
+    cases.append(("triple_mutants_compact/Abl_50", lambda: point_mutants_to_aa(abl_50, 3, compact=True)))
+
+    # constants of many sequences at once, and of a whole mutant library by deltas
+    random_state = random.Random(1)
+    library = ["".join(random_state.choice('ACDEFGHIKLMNPQRSTVWY') for _ in range(300)) for _ in range(10000)]
+    cases.append(("constants_batch/10000x300", lambda: calculate_constants_batch(library)))
+    mutant_set = two_dna_point_mutants_to_aa(abl, compact=True)
+    cases.append(("mutant_constants/Abl_doubles",
+                  lambda: calculate_mutant_constants(mutant_set.aa_sequence, mutant_set.deltas)))
+    return cases
+
+def measure(function, repeat=3, min_time=0.2):
+    """
+    Returns the best time of one call in seconds, and the peak memory one call
+    allocates in bytes (tracemalloc sees both Python and NumPy allocations)
+    """
+    # enough calls per timing that short benchmarks are not lost in timer noise
+    number = 1
+    while True:
+        elapsed = timeit.timeit(function, number=number)
+        if elapsed >= min_time or number >= 10**6:
+            break
+        number *= 10
+    best = elapsed / number
+    # a call that takes seconds is timed once; repeats would only add minutes
+    if elapsed < 1.0:
+        best = min([elapsed] + timeit.repeat(function, number=number, repeat=repeat-1)) / number
+
+    tracemalloc.start()
+    try:
+        function()
+        current, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return best, peak
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="peanut benchmarks")
+    parser.add_argument('--filter', default='', help="only run benchmarks whose name contains this text")
+    parser.add_argument('--baseline', default=default_baseline, help="baseline JSON (default = baseline.json)")
+    parser.add_argument('--save', action='store_true', help="save the results as the baseline")
+    parser.add_argument('--tolerance', type=float, default=1.5,
+                        help="allowed slowdown or memory growth factor against the baseline (default = 1.5)")
+    args = parser.parse_args(argv)
+
+    baseline = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline, 'r') as fi:
+            baseline = json.load(fi)['results']
+
+    results = {}
+    regressions = []
+    print("%-40s %12s %12s %10s %10s" % ("benchmark", "time (s)", "peak (MB)", "time x", "memory x"))
+    for name, function in benchmarks():
+        if args.filter not in name:
+            continue
+        elapsed, peak = measure(function)
+        results[name] = {'time': elapsed, 'peak_memory': peak}
+        time_ratio = memory_ratio = ""
+        if name in baseline:
+            time_factor = elapsed / baseline[name]['time']
+            memory_factor = float(peak) / max(1, baseline[name]['peak_memory'])
+            time_ratio = "%.2f" % time_factor
+            memory_ratio = "%.2f" % memory_factor
+            if time_factor > args.tolerance or memory_factor > args.tolerance:
+                regressions.append(name)
+                memory_ratio += " !"
+        print("%-40s %12.3e %12.3f %10s %10s" % (name, elapsed, peak/1e6, time_ratio, memory_ratio))
+        sys.stdout.flush()
+
+    if args.save:
+        if os.path.exists(args.baseline):
+            # keep the baseline of benchmarks not run this time
+            baseline.update(results)
+            results = baseline
+        with open(args.baseline, 'w') as fo:
+            json.dump({'machine': {'python': platform.python_version(), 'numpy': np.__version__,
+                                   'platform': platform.platform(), 'processor': platform.processor()},
+                       'results': results}, fo, indent=1, sort_keys=True)
+        print("\nsaved baseline to "+args.baseline)
+    if regressions:
+        print("\nregressions beyond %.2fx: %s" % (args.tolerance, ", ".join(regressions)))
+        return 1
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
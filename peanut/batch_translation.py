@@ -0,0 +1,271 @@
+"""
+Translates whole drops of sequencing reads, e.g. a plate of Sanger .seq files, on a
+pool of worker processes, picking the reading frame of each read with the fewest
+stop codons as dna_to_aa(try_frames=True) does, and collects every translation into
+one table with a status per record
+
+Reads are streamed from the input files with peanut.seqio and handed to the workers
+in chunks, so a single large FASTA / FASTQ file is spread over the pool as well as a
+directory of many small files
+
+Dependencies:
+    Requires NumPy
+"""
+from collections import namedtuple
+import glob
+import os.path
+
+from peanut import instrumentation
+from peanut.seqio import read_sequences
+
+# translation of one read
+#     filename : str, file the read came from
+#     name : str, record name; None if the file could not be read
+#     status : str, 'ok', 'empty' (no nucleotides) or 'error'
+#     frame : int, index 0-5 of the chosen frame as in scan_frames(); None unless ok
+#     strand : str, '+' or '-'; None unless ok
+#     n_stops : int, stop codons in the chosen frame; None unless ok
+#     aa_sequence : str, translation of the chosen frame; '' unless ok
+#     message : str, reason for an error; '' otherwise
+ReadTranslation = namedtuple('ReadTranslation',
+                             ['filename', 'name', 'status', 'frame', 'strand', 'n_stops', 'aa_sequence', 'message'])
+
+# reads handed to a worker at a time
+CHUNK_SIZE = 256
+# reads longer than this are translated one at a time rather than padded into the
+# chunk's array, so one long read cannot blow up the array of a chunk of short ones
+MAX_BATCH_LENGTH = 10000
+
+def expand_paths(paths):
+    """
+    Expands directories and glob patterns into a sorted list of files
+
+    Arguments:
+    ----------
+        paths : list of str
+            files, directories (every file directly inside, except hidden files and
+            README files) or glob patterns
+    Returns:
+    --------
+        filenames : list of str
+            with duplicates removed, in the order paths were given
+    """
+    filenames = []
+    for path in paths:
+        if os.path.isdir(path):
+            matches = [os.path.join(path, name) for name in sorted(os.listdir(path))
+                       if not name.startswith('.') and not name.upper().startswith('README')]
+            matches = [name for name in matches if os.path.isfile(name)]
+        elif os.path.exists(path):
+            matches = [path]
+        else:
+            matches = sorted(glob.glob(path))
+            if not matches:
+                raise IOError("no files match "+path)
+        for match in matches:
+            if match not in filenames:
+                filenames.append(match)
+    return filenames
+
+def translate_read(sequence):
+    """
+    Picks and translates the reading frame of a read with the fewest stop codons
+
+    Arguments:
+    ----------
+        sequence : str
+            DNA or RNA nucleotide sequence
+    Returns:
+    --------
+        frame : FrameTranslation
+            the first frame (in scan_frames() order) with the fewest stops, so
+            frame.aa_sequence == dna_to_aa(sequence, try_frames=True)
+    """
+    from peanut.convert_dna_to_aa import scan_frames
+    frames = scan_frames(sequence)
+    stops = [len(frame.stop_positions) for frame in frames]
+    return frames[stops.index(min(stops))]
+
+def _pick_frames(sequences):
+    """
+    Does the work of translate_read() for many reads at once: the reads are padded into
+    one array, reverse complemented row by row and translated in all six frames with
+    one codon table lookup per frame
+
+    Arguments:
+    ----------
+        sequences : list of str
+            ASCII nucleotide sequences, each at least 3 long
+    Returns:
+    --------
+        frames : list of (int, int, str)
+            frame index, number of stops and amino acid sequence of the chosen frame of
+            each read
+    """
+    import numpy as np
+    from peanut.codon_table import COMPLEMENT_CODES, NUCLEOTIDE_CODES, UNKNOWN_BASE, translate_codes
+    from peanut.convert_dna_to_aa import pad_sequences
+
+    array, lengths = pad_sequences(sequences)
+    codes = NUCLEOTIDE_CODES[array]
+    # reverse complement each row within its own length; padding stays unknown
+    reverse = lengths[:, np.newaxis] - 1 - np.arange(array.shape[1])
+    rc_codes = COMPLEMENT_CODES[codes[np.arange(len(sequences))[:, np.newaxis], np.maximum(reverse, 0)]]
+    rc_codes[reverse < 0] = UNKNOWN_BASE
+
+    residues = []
+    stops = np.empty((len(sequences), 6), dtype=np.intp)
+    for strand_codes in [codes, rc_codes]:
+        for offset in range(3):
+            frame_residues = translate_codes(strand_codes[:, offset:])
+            in_read = np.arange(frame_residues.shape[1]) < ((lengths-offset)//3)[:, np.newaxis]
+            stops[:, len(residues)] = np.count_nonzero((frame_residues == ord('*')) & in_read, axis=1)
+            residues.append(frame_residues)
+    # argmin takes the first frame on ties, as dna_to_aa(try_frames=True) does
+    chosen = stops.argmin(axis=1)
+    frames = []
+    for k, frame in enumerate(chosen):
+        n_codons = (lengths[k] - frame % 3)//3
+        frames.append((int(frame), int(stops[k, frame]), residues[frame][k, :n_codons].tobytes().decode('ascii')))
+    return frames
+
+def _translate_chunk(chunk):
+    """
+    Worker for translate_reads(): translates a chunk of (filename, name, sequence),
+    or passes on the ReadTranslation of a file that could not be read
+    """
+    if isinstance(chunk, ReadTranslation):
+        return [chunk]
+    translations = [None]*len(chunk)
+    batch = []
+    for k, (filename, name, sequence) in enumerate(chunk):
+        if len(sequence) < 3:
+            translations[k] = ReadTranslation(filename, name, 'empty', None, None, None, '', '')
+        elif len(sequence) <= MAX_BATCH_LENGTH and sequence.isascii():
+            batch.append(k)
+        else:
+            try:
+                frame = translate_read(sequence)
+            except Exception as error:
+                translations[k] = ReadTranslation(filename, name, 'error', None, None, None, '', str(error))
+                continue
+            translations[k] = ReadTranslation(filename, name, 'ok', frame.frame, frame.strand,
+                                              len(frame.stop_positions), frame.aa_sequence, '')
+    if batch:
+        for k, (frame, n_stops, aa_sequence) in zip(batch, _pick_frames([chunk[k][2] for k in batch])):
+            translations[k] = ReadTranslation(chunk[k][0], chunk[k][1], 'ok', frame, '+' if frame < 3 else '-',
+                                              n_stops, aa_sequence, '')
+    return translations
+
+def _chunks(filenames, chunk_size, memory_map):
+    """
+    Streams the reads of every file in chunks; a file that cannot be read, or holds
+    no records, gives a ReadTranslation of its own in place of a chunk
+    """
+    chunk = []
+    for filename in filenames:
+        n_records = 0
+        try:
+            for record in read_sequences(filename, memory_map=memory_map):
+                n_records += 1
+                chunk.append((filename, record.name, record.sequence))
+                if len(chunk) == chunk_size:
+                    yield chunk
+                    chunk = []
+        except (IOError, OSError, UnicodeDecodeError) as error:
+            if chunk:
+                yield chunk
+                chunk = []
+            yield ReadTranslation(filename, None, 'error', None, None, None, '', str(error))
+            continue
+        if n_records == 0:
+            if chunk:
+                yield chunk
+                chunk = []
+            yield ReadTranslation(filename, None, 'empty', None, None, None, '', '')
+    if chunk:
+        yield chunk
+
+def translate_reads(paths, workers=None, chunk_size=CHUNK_SIZE, memory_map=False):
+    """
+    Translates every read found in files, directories or glob patterns, on a pool of
+    worker processes
+
+    Arguments:
+    ----------
+        paths : list of str
+            files, directories or glob patterns, as taken by expand_paths(); files may
+            be plain sequence, FASTA or FASTQ
+        Optional:
+        ---------
+            workers : int
+                number of worker processes; None uses every core, and 1 translates in
+                this process without a pool (default = None)
+            chunk_size : int
+                number of reads handed to a worker at a time (default = CHUNK_SIZE)
+            memory_map : Bool
+                if memory_map==True, memory-map the input files (default = False)
+    Returns:
+    --------
+        translations : generator of ReadTranslation
+            in the order the reads appear in the files
+    """
+    filenames = expand_paths(paths)
+    if workers is None:
+        workers = os.cpu_count() or 1
+    chunks = _chunks(filenames, chunk_size, memory_map)
+
+    if workers == 1:
+        for chunk in chunks:
+            translations = _translate_chunk(chunk)
+            if instrumentation.active:
+                _record(translations)
+            for translation in translations:
+                yield translation
+        return
+
+    import multiprocessing
+    pool = multiprocessing.Pool(workers)
+    try:
+        # imap keeps the chunks in order while the pool works ahead
+        for translations in pool.imap(_translate_chunk, chunks):
+            # workers run in other processes, so their events are recorded here
+            if instrumentation.active:
+                _record(translations)
+            for translation in translations:
+                yield translation
+    finally:
+        pool.terminate()
+        pool.join()
+
+def _record(translations):
+    """
+    Records the reads of a translated chunk by status, with a warning per error
+    """
+    for translation in translations:
+        instrumentation.count('reads_'+translation.status)
+        if translation.status == 'error':
+            instrumentation.warn('read_error', translation.message, filename=translation.filename,
+                                 record=translation.name)
+
+def write_translations(translations, filename):
+    """
+    Writes read translations to a single tab-separated table, one read per line
+
+    Arguments:
+    ----------
+        translations : iterable of ReadTranslation
+        filename : str
+            file to write
+    Returns:
+    --------
+        status_counts : dict
+            number of reads written with each status
+    """
+    status_counts = {}
+    with open(filename, 'w') as fo:
+        fo.write("\t".join(ReadTranslation._fields)+"\n")
+        for translation in translations:
+            fo.write("\t".join('' if value is None else str(value) for value in translation)+"\n")
+            status_counts[translation.status] = status_counts.get(translation.status, 0) + 1
+    return status_counts
@@ -0,0 +1,279 @@
+"""
+Content-addressed on-disk cache for translations, mutant sets and mutant counts, so
+repeat runs over the same nucleotide sequences do not recompute them
+
+Entries are keyed by a hash of the input sequence, the genetic code and the
+parameters of the computation, and are evicted least recently used first once the
+cache directory grows past its size limit
+
+The cache directory defaults to ~/.cache/peanut, or $PEANUT_CACHE_DIR if set, and
+its size limit to 1 GB, or $PEANUT_CACHE_MAX_BYTES if set
+
+To inspect or invalidate the cache:
+    python -m peanut.cache list
+    python -m peanut.cache stats
+    python -m peanut.cache invalidate filename_wildtype_sequence
+    python -m peanut.cache clear
+"""
+import hashlib
+import json
+import os
+import pickle
+import sys
+import tempfile
+import time
+
+# bump whenever the layout or meaning of stored values changes
+CACHE_VERSION = 1
+DEFAULT_MAX_BYTES = 2**30
+SUFFIX = '.pkl'
+
+def default_directory():
+    """
+    Returns the cache directory to use when none is given
+    """
+    directory = os.environ.get('PEANUT_CACHE_DIR')
+    if directory is None:
+        directory = os.path.join(os.path.expanduser('~'), '.cache', 'peanut')
+    return directory
+
+def _digest(text):
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()[:32]
+
+class Cache(object):
+    """
+    Constructor:
+    ------------
+        Cache(directory=None, max_bytes=None)
+        Arguments:
+        ----------
+            directory : str
+                where entries are stored (default = default_directory())
+            max_bytes : int
+                total size of entries kept before the least recently used are evicted
+                (default = $PEANUT_CACHE_MAX_BYTES or DEFAULT_MAX_BYTES)
+
+    Attributes:
+    -----------
+        self.directory : str
+        self.max_bytes : int
+    Methods:
+    --------
+        key()
+            returns the key for a sequence, kind of computation and parameters
+        get(), put()
+            read and write a single entry by key
+        fetch()
+            returns a cached result, computing and storing it on a miss
+        entries()
+            lists the stored entries
+        invalidate()
+            removes every entry computed from a sequence
+        clear()
+            removes every entry
+    """
+    def __init__(self, directory=None, max_bytes=None):
+        """
+        Arguments:
+        ----------
+            directory : str
+                where entries are stored (default = default_directory())
+            max_bytes : int
+                total size of entries kept before the least recently used are evicted
+                (default = $PEANUT_CACHE_MAX_BYTES or DEFAULT_MAX_BYTES)
+        """
+        if directory is None:
+            directory = default_directory()
+        if max_bytes is None:
+            max_bytes = int(os.environ.get('PEANUT_CACHE_MAX_BYTES', DEFAULT_MAX_BYTES))
+        self.directory = directory
+        self.max_bytes = max_bytes
+        return
+
+    @staticmethod
+    def key(kind, sequence, **params):
+        """
+        Returns the key of a computation
+
+        Arguments:
+        ----------
+            kind : str
+                name of the computation, e.g. 'translation'
+            sequence : str
+                input nucleotide sequence
+            Optional:
+            ---------
+                params : keyword arguments
+                    JSON serializable parameters of the computation
+        Returns:
+        --------
+            key : str
+                kind-sequence_hash-parameter_hash
+        """
+        # the genetic code is only loaded (with NumPy) once a key is needed, so that
+        # inspecting the cache stays cheap
+        from peanut.codon_table import CODON_TABLE
+        settings = json.dumps({'version': CACHE_VERSION, 'genetic_code': CODON_TABLE,
+                               'params': params}, sort_keys=True)
+        return "%s-%s-%s" % (kind, _digest(sequence), _digest(settings))
+
+    def _path(self, key):
+        return os.path.join(self.directory, key+SUFFIX)
+
+    def get(self, key):
+        """
+        Returns (True, value) if key is cached, otherwise (False, None)
+        """
+        path = self._path(key)
+        try:
+            with open(path, 'rb') as fi:
+                value = pickle.load(fi)
+        except (IOError, OSError, EOFError, pickle.UnpicklingError):
+            return False, None
+        # the modification time records the last use, for LRU eviction
+        try:
+            os.utime(path, None)
+        except OSError:
+            pass
+        return True, value
+
+    def put(self, key, value):
+        """
+        Stores value under key, then evicts least recently used entries until the
+        cache fits in max_bytes
+        """
+        if not os.path.isdir(self.directory):
+            os.makedirs(self.directory)
+        handle, temporary = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+        try:
+            with os.fdopen(handle, 'wb') as fo:
+                pickle.dump(value, fo, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(temporary, self._path(key))
+        except BaseException:
+            os.remove(temporary)
+            raise
+        self._evict()
+        return
+
+    def fetch(self, kind, sequence, compute, **params):
+        """
+        Returns compute(sequence, **params), from the cache if it was computed before
+
+        Arguments:
+        ----------
+            kind : str
+                name of the computation, e.g. 'translation'
+            sequence : str
+                input nucleotide sequence
+            compute : function
+                called as compute(sequence, **params) on a cache miss
+            Optional:
+            ---------
+                params : keyword arguments
+                    JSON serializable parameters, passed on to compute
+        Returns:
+        --------
+            value : whatever compute returns
+        """
+        key = self.key(kind, sequence, **params)
+        found, value = self.get(key)
+        if not found:
+            value = compute(sequence, **params)
+            self.put(key, value)
+        return value
+
+    def entries(self):
+        """
+        Lists the stored entries, least recently used first
+
+        Returns:
+        --------
+            entries : list of tuple
+                (key, size in bytes, time of last use) per entry
+        """
+        if not os.path.isdir(self.directory):
+            return []
+        entries = []
+        for name in os.listdir(self.directory):
+            if not name.endswith(SUFFIX):
+                continue
+            try:
+                stat = os.stat(os.path.join(self.directory, name))
+            except OSError:
+                continue
+            entries.append((name[:-len(SUFFIX)], stat.st_size, stat.st_mtime))
+        entries.sort(key=lambda entry: entry[2])
+        return entries
+
+    def _remove(self, key):
+        try:
+            os.remove(self._path(key))
+        except OSError:
+            return False
+        return True
+
+    def _evict(self):
+        entries = self.entries()
+        total = sum(size for key, size, last_used in entries)
+        for key, size, last_used in entries:
+            if total <= self.max_bytes:
+                break
+            if self._remove(key):
+                total -= size
+        return
+
+    def invalidate(self, sequence):
+        """
+        Removes every entry computed from sequence
+
+        Returns:
+        --------
+            n_removed : int
+        """
+        sequence_hash = _digest(sequence)
+        # kind may itself contain '-', e.g. 'count-mutants', so split from the right
+        return sum(self._remove(key) for key, size, last_used in self.entries()
+                   if key.rsplit('-', 2)[1] == sequence_hash)
+
+    def clear(self):
+        """
+        Removes every entry
+
+        Returns:
+        --------
+            n_removed : int
+        """
+        return sum(self._remove(key) for key, size, last_used in self.entries())
+
+def main(argv=None):
+    import argparse
+    parser = argparse.ArgumentParser(prog='python -m peanut.cache',
+                                     description="Inspect or invalidate the peanut cache")
+    parser.add_argument('--dir', default=None, help="cache directory (default = %s)" % default_directory())
+    commands = parser.add_subparsers(dest='command')
+    commands.required = True
+    commands.add_parser('list', help="list entries, least recently used first")
+    commands.add_parser('stats', help="number and total size of entries")
+    invalidate = commands.add_parser('invalidate', help="remove entries computed from a sequence file")
+    invalidate.add_argument('filename', help="sequence file, plain or the first record of FASTA / FASTQ")
+    commands.add_parser('clear', help="remove every entry")
+    args = parser.parse_args(argv)
+
+    cache = Cache(args.dir)
+    if args.command == 'list':
+        for key, size, last_used in cache.entries():
+            print("%s\t%d\t%s" % (key, size, time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(last_used))))
+    elif args.command == 'stats':
+        entries = cache.entries()
+        print("%s: %d entries, %d bytes (limit %d)" % (cache.directory, len(entries),
+                                                       sum(size for key, size, last_used in entries), cache.max_bytes))
+    elif args.command == 'invalidate':
+        # the same sequence the scripts and JobRunner cache under
+        from peanut.seqio import read_sequence
+        print("removed %d entries" % cache.invalidate(read_sequence(args.filename)))
+    elif args.command == 'clear':
+        print("removed %d entries" % cache.clear())
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
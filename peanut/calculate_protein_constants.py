@@ -2,8 +2,15 @@
 Calculates extinction coefficients, molecular weight, and absorbance for proteins or 
 protein segments of interest based on string representations of sequences
 
-Dependencies : None
+Dependencies : NumPy (calculate_constants_batch and calculate_mutant_constants only,
+               imported on first use so the scalar functions load without it)
 """
+from peanut import instrumentation
+
+# wtf do you do with B and Z?
+aa_to_mw = {'A':89.0935, 'C':121.1590, 'D':133.1032, 'E':147.1299, 'F':165.1900, 'G':75.0669, 'H':155.1552, 'I':131.1736, 'K':146.1882, 'L':131.1736, 'M':149.2124, 'N':132.1184, 'P':115.1310, 'Q':146.1451, 'R':174.2017, 'S':105.0930, 'T':119.1197, 'V':117.1469, 'W':204.2262, 'Y':181.1894}
+# molecular weight of the water molecule given off in each peptide bond
+water_mw = 18.01528
 
 def calculate_extinction_coeff(aa_sequence, verbose=True):
     """
@@ -26,6 +33,8 @@ def calculate_extinction_coeff(aa_sequence, verbose=True):
     count_Tyr = aa_sequence.count('Y')
     count_Trp = aa_sequence.count('W')
     count_Cys = aa_sequence.count('C')
+    if instrumentation.active:
+        instrumentation.emit('info', 'residue_counts', None, Tyr=count_Tyr, Trp=count_Trp, Cys=count_Cys)
     if verbose==True:
         print(str(count_Tyr)+" Tyr")
         print(str(count_Trp)+" Trp")
@@ -50,11 +59,9 @@ def calculate_molecular_weight(aa_sequence):
         molecular_weight : float 
             Molecular Weight in g/mol
     """
-    # wtf do you do with B and Z?
-    aa_to_mw = {'A':89.0935, 'C':121.1590, 'D':133.1032, 'E':147.1299, 'F':165.1900, 'G':75.0669, 'H':155.1552, 'I':131.1736, 'K':146.1882, 'L':131.1736, 'M':149.2124, 'N':132.1184, 'P':115.1310, 'Q':146.1451, 'R':174.2017, 'S':105.0930, 'T':119.1197, 'V':117.1469, 'W':204.2262, 'Y':181.1894}
     molecular_weight = 0.0
     for k, char in enumerate(aa_sequence):
-        if not aa_to_mw.has_key(char):
+        if char not in aa_to_mw:
             if char == '*' and k == len(aa_sequence)-1:
                 continue
             if char == '\n':
@@ -63,7 +70,7 @@ def calculate_molecular_weight(aa_sequence):
                 raise IOError(str(char)+" is not a recognized amino acid")
         molecular_weight += aa_to_mw[char]
         if k != 0: # water mlc given off in peptide bond
-            molecular_weight -= 18.01528
+            molecular_weight -= water_mw
     return molecular_weight
 
 def calculate_absorbance(aa_sequence, secreted=None, molecular_weight=None):
@@ -94,3 +101,196 @@ def calculate_absorbance(aa_sequence, secreted=None, molecular_weight=None):
     absorbance = secreted / molecular_weight
     return absorbance
 
+
+# residue alphabet used by calculate_constants_batch: the 20 amino acids, then stop,
+# newline and anything else
+_alphabet = sorted(aa_to_mw)
+_STOP, _NEWLINE, _OTHER = range(len(_alphabet), len(_alphabet)+3)
+_n_codes = _OTHER+1
+# sequences counted per bincount call; keeps the working arrays small enough to stay in cache
+_batch_rows = 4096
+_tables = None
+
+def _lookup_tables():
+    """
+    Builds the NumPy lookup tables on first use
+
+    Returns:
+    --------
+        residue_codes : numpy.ndarray of uint8
+            ASCII value -> code in the residue alphabet
+        residue_mw : numpy.ndarray of float
+            molecular weight of each of the 20 amino acids, in alphabet order
+        code_mw : numpy.ndarray of float
+            molecular weight by code, 0 for stop, newline and anything else
+    """
+    global _tables
+    if _tables is None:
+        import numpy as np
+        residue_codes = np.full(256, _OTHER, dtype=np.uint8)
+        for code, char in enumerate(_alphabet):
+            residue_codes[ord(char)] = code
+        residue_codes[ord('*')] = _STOP
+        residue_codes[ord('\n')] = _NEWLINE
+        residue_mw = np.array([aa_to_mw[char] for char in _alphabet])
+        code_mw = np.concatenate([residue_mw, np.zeros(_n_codes-len(_alphabet))])
+        _tables = residue_codes, residue_mw, code_mw
+    return _tables
+
+@instrumentation.timed
+def calculate_constants_batch(aa_sequences):
+    """
+    Calculates both extinction coefficients, molecular weight and absorbance for many
+    amino acid sequences at once, from a histogram of residue counts per sequence
+
+    Gives the same values as calculate_extinction_coeff(), calculate_molecular_weight()
+    and calculate_absorbance(), to within floating point rounding, and raises the same
+    IOError for unrecognized residues
+
+    Arguments:
+    ----------
+        aa_sequences : list of str, or numpy.ndarray of uint8, shape (n_sequences, max_length)
+            1-letter code amino acid sequences; an array holds ASCII residues, one
+            sequence per row, padded with 0 at the end (as returned by
+            convert_dna_to_aa.translate_batch())
+    Returns:
+    --------
+        secreted : numpy.ndarray of float
+            Extinction Coefficient in cm^-1 M^-1 assuming all cysteines form cystines
+        cytosolic : numpy.ndarray of float
+            Extinction Coefficient in cm^-1 M^-1 ignoring cystines
+        molecular_weight : numpy.ndarray of float
+            Molecular Weight in g/mol
+        absorbance : numpy.ndarray of float
+            secreted / molecular_weight
+    """
+    import numpy as np
+    residue_codes, residue_mw, code_mw = _lookup_tables()
+
+    if isinstance(aa_sequences, np.ndarray):
+        lengths = np.count_nonzero(aa_sequences, axis=1)
+        characters = aa_sequences[aa_sequences != 0]
+    else:
+        lengths = np.array([len(aa_sequence) for aa_sequence in aa_sequences], dtype=np.intp)
+        characters = np.frombuffer("".join(aa_sequences).encode('ascii'), dtype=np.uint8)
+    n_sequences = len(lengths)
+    ends = np.cumsum(lengths)
+    starts = ends - lengths
+
+    counts = np.empty((n_sequences, _n_codes), dtype=np.int64)
+    for first in range(0, n_sequences, _batch_rows):
+        last = min(n_sequences, first+_batch_rows)
+        residues = residue_codes[characters[starts[first]:ends[last-1]]]
+        # a stop is only allowed as the final character of a sequence
+        unusual = np.flatnonzero(residues >= _STOP)
+        if len(unusual):
+            positions = unusual + starts[first]
+            bad = (residues[unusual] == _OTHER) | ((residues[unusual] == _STOP) & ~np.isin(positions, ends[first:last]-1))
+            if bad.any():
+                position = positions[bad][0]
+                row = np.searchsorted(ends, position, side='right')
+                aa_sequence = aa_sequences[row]
+                if isinstance(aa_sequences, np.ndarray):
+                    aa_sequence = aa_sequence[aa_sequence != 0].tobytes().decode('ascii')
+                raise IOError(str(aa_sequence[position-starts[row]])+" is not a recognized amino acid")
+        rows = np.repeat(np.arange(last-first)*_n_codes, lengths[first:last])
+        counts[first:last] = np.bincount(rows + residues, minlength=(last-first)*_n_codes).reshape(-1, _n_codes)
+    counts = counts[:, :len(_alphabet)]
+
+    count_Tyr = counts[:, _alphabet.index('Y')]
+    count_Trp = counts[:, _alphabet.index('W')]
+    count_Cys = counts[:, _alphabet.index('C')]
+    cytosolic = 1490.0*count_Tyr + 5500.0*count_Trp
+    secreted = 1490.0*count_Tyr + 5500.0*count_Trp + 125.0*count_Cys/2.0
+
+    # one water per residue, except for a residue in the first position
+    n_residues = counts.sum(axis=1)
+    first_is_residue = np.zeros(n_sequences, dtype=bool)
+    nonempty = lengths > 0
+    first_is_residue[nonempty] = residue_codes[characters[starts[nonempty]]] < len(_alphabet)
+    molecular_weight = counts.dot(residue_mw) - water_mw*(n_residues - first_is_residue)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        absorbance = secreted / molecular_weight
+    return secreted, cytosolic, molecular_weight, absorbance
+
+@instrumentation.timed
+def calculate_mutant_constants(wt_aa_sequence, deltas):
+    """
+    Calculates both extinction coefficients, molecular weight and absorbance for
+    point mutants of a wild type, from the wild type totals and each mutant's
+    substitutions only, so each mutant costs O(number of substitutions) instead of a
+    rescan of its full sequence
+
+    Gives the same values as calculating each mutant sequence with
+    calculate_extinction_coeff(), calculate_molecular_weight() and
+    calculate_absorbance(), to within floating point rounding
+
+    Arguments:
+    ----------
+        wt_aa_sequence : str
+            1-letter code amino acid sequence of the wild type
+        deltas : list of tuple, or numpy.ndarray of mutant_set.DELTA_DTYPE
+            each tuple holds the (position, new residue) pairs of one mutant, with
+            0-indexed positions into wt_aa_sequence (as from
+            convert_dna_to_aa.two_dna_point_mutant_deltas()); an array holds one
+            mutant per row (as MutantSet.deltas)
+    Returns:
+    --------
+        secreted : numpy.ndarray of float
+            Extinction Coefficient in cm^-1 M^-1 assuming all cysteines form cystines
+        cytosolic : numpy.ndarray of float
+            Extinction Coefficient in cm^-1 M^-1 ignoring cystines
+        molecular_weight : numpy.ndarray of float
+            Molecular Weight in g/mol
+        absorbance : numpy.ndarray of float
+            secreted / molecular_weight
+    """
+    import numpy as np
+    from peanut.mutant_set import NO_POSITION
+    residue_codes, residue_mw, code_mw = _lookup_tables()
+
+    wt_secreted, wt_cytosolic = calculate_extinction_coeff(wt_aa_sequence, verbose=False)
+    wt_molecular_weight = calculate_molecular_weight(wt_aa_sequence)
+
+    if isinstance(deltas, np.ndarray):
+        n_mutants = len(deltas)
+        used = deltas['position'] != NO_POSITION
+        rows = np.nonzero(used)[0]
+        positions = deltas['position'][used].astype(np.intp)
+        new_characters = deltas['residue'][used].view(np.uint8)
+    else:
+        deltas = list(deltas)
+        n_mutants = len(deltas)
+        rows = np.array([row for row, delta in enumerate(deltas) for position, residue in delta], dtype=np.intp)
+        positions = np.array([position for delta in deltas for position, residue in delta], dtype=np.intp)
+        new_characters = np.frombuffer("".join(residue for delta in deltas for position, residue in delta).encode('ascii'),
+                                       dtype=np.uint8)
+    old_characters = np.frombuffer(wt_aa_sequence.encode('ascii'), dtype=np.uint8)[positions]
+
+    new_codes = residue_codes[new_characters]
+    # a stop is only allowed as the final character of a sequence
+    bad = (new_codes == _OTHER) | ((new_codes == _STOP) & (positions != len(wt_aa_sequence)-1))
+    if bad.any():
+        raise IOError(chr(new_characters[bad][0])+" is not a recognized amino acid")
+    old_codes = residue_codes[old_characters]
+
+    def change(new_values, old_values):
+        return np.bincount(rows, weights=new_values-old_values, minlength=n_mutants)
+
+    # a residue in any but the first position gives off a water in its peptide bond
+    water = water_mw*(positions != 0)
+    new_mw = np.where(new_codes < len(_alphabet), code_mw[new_codes]-water, 0.0)
+    old_mw = np.where(old_codes < len(_alphabet), code_mw[old_codes]-water, 0.0)
+    molecular_weight = wt_molecular_weight + change(new_mw, old_mw)
+
+    counts = {}
+    for residue in ['Y', 'W', 'C']:
+        code = _alphabet.index(residue)
+        counts[residue] = change((new_codes == code).astype(float), (old_codes == code).astype(float))
+    cytosolic = wt_cytosolic + 1490.0*counts['Y'] + 5500.0*counts['W']
+    secreted = wt_secreted + 1490.0*counts['Y'] + 5500.0*counts['W'] + 125.0*counts['C']/2.0
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        absorbance = secreted / molecular_weight
+    return secreted, cytosolic, molecular_weight, absorbance
@@ -0,0 +1,376 @@
+"""
+Command line interface to peanut, installed as the `peanut` console command
+
+    peanut translate filename_wildtype_sequence [--try-frames] [--output filename]
+    peanut count-mutants filename_wildtype_sequence [--max-mutations 2]
+    peanut constants filename_aminoacid_sequence
+    peanut design-primers filename_wildtype_sequence first_residue X###X [X###X ...] [--out-dir primers]
+    peanut batch manifest.csv|manifest.json
+    peanut translate-reads path [path ...] --output translations.tsv [--workers N]
+    peanut identify path [path ...] --references path [path ...] [--protein] [--k 5]
+
+With --profile before the subcommand, e.g. `peanut --profile batch jobs.csv`, stage
+timings, iteration counts and warnings are collected while the command runs and a
+summary is written to stderr at the end (see peanut.instrumentation)
+
+Sequence files may be plain (one sequence, as in nucleotide_sequences/), or FASTA or
+FASTQ with any number of records, which are streamed one at a time; output for
+FASTA / FASTQ files has one line per record, starting with the record name
+
+A batch manifest lists many jobs, each with a command and the arguments of that
+subcommand, and runs them all in one process: sequence files, translations, mutant
+counts and PrimerGenerators are shared between jobs instead of rebuilt per job
+
+CSV manifests have a header row naming the columns command, filename, and any of
+first_residue, mutants, max_mutations, try_frames, output, out_dir; mutants are
+separated by spaces or semicolons. JSON manifests are a list of objects with the
+same keys, where mutants may also be a list
+"""
+import argparse
+import csv
+import json
+import os.path
+import sys
+
+from peanut import instrumentation
+from peanut.cache import Cache
+from peanut.calculate_protein_constants import calculate_extinction_coeff, calculate_molecular_weight
+from peanut.seqio import guess_format, read_sequence, read_sequences, write_fasta
+
+# convert_dna_to_aa and primer_design (and with them NumPy) are imported by the jobs
+# that need them, so e.g. constants jobs start without loading NumPy
+
+COMMANDS = ['translate', 'count-mutants', 'constants', 'design-primers']
+
+class JobRunner(object):
+    """
+    Constructor:
+    ------------
+        JobRunner(cache=None, memory_map=False)
+        Arguments:
+        ----------
+            cache : peanut.cache.Cache
+                on-disk cache for translations and mutant counts (default = Cache())
+            memory_map : Bool
+                if memory_map==True, memory-map FASTA / FASTQ files (default = False)
+
+    Attributes:
+    -----------
+        self.cache : peanut.cache.Cache
+        self.memory_map : Bool
+    Methods:
+    --------
+        translate(), count_mutants(), constants(), design_primers()
+            run one job, yielding its output line by line
+        run()
+            runs one job given as a dict, as read from a manifest
+    """
+    def __init__(self, cache=None, memory_map=False):
+        """
+        Arguments:
+        ----------
+            cache : peanut.cache.Cache
+                on-disk cache for translations and mutant counts (default = Cache())
+            memory_map : Bool
+                if memory_map==True, memory-map FASTA / FASTQ files (default = False)
+        """
+        if cache is None:
+            cache = Cache()
+        self.cache = cache
+        self.memory_map = memory_map
+        self._sequences = {}
+        self._generators = {}
+        return
+
+    def read_sequence(self, filename):
+        """
+        Returns the sequence of the first record of a sequence file, read once per
+        runner
+        """
+        if filename not in self._sequences:
+            self._sequences[filename] = read_sequence(filename)
+        return self._sequences[filename]
+
+    def _records(self, filename):
+        """
+        Streams (name, sequence) for each record of a sequence file; a plain sequence
+        file gives a single record named None, whose results are cached on disk
+        """
+        if guess_format(filename) == 'plain':
+            return iter([(None, self.read_sequence(filename))])
+        return ((record.name, record.sequence) for record in read_sequences(filename, memory_map=self.memory_map))
+
+    def translate(self, filename, try_frames=False, output=None):
+        """
+        Translates each record of a nucleotide sequence file, optionally writing the
+        amino acid sequences to output (as FASTA, for FASTA / FASTQ input)
+        """
+        from peanut.convert_dna_to_aa import dna_to_aa
+        fo = open(output, 'w') if output is not None else None
+        try:
+            for name, sequence in self._records(filename):
+                if name is None:
+                    aa_sequence = self.cache.fetch('translation', sequence, dna_to_aa, try_frames=try_frames)
+                    if fo is not None:
+                        fo.write(aa_sequence)
+                    yield aa_sequence
+                else:
+                    aa_sequence = dna_to_aa(sequence, try_frames=try_frames)
+                    if fo is not None:
+                        write_fasta([(name, aa_sequence)], fo)
+                    yield name+"\t"+aa_sequence
+        finally:
+            if fo is not None:
+                fo.close()
+
+    def count_mutants(self, filename, max_mutations=2):
+        """
+        Counts the amino acid sequences within max_mutations nucleotide changes of each
+        record of a nucleotide sequence file
+        """
+        from peanut.convert_dna_to_aa import count_point_mutants
+        for name, sequence in self._records(filename):
+            if name is None:
+                yield str(self.cache.fetch('point_mutant_count', sequence, count_point_mutants,
+                                           max_mutations=max_mutations))
+            else:
+                yield name+"\t"+str(count_point_mutants(sequence, max_mutations=max_mutations))
+
+    def constants(self, filename):
+        """
+        Calculates extinction coefficients, molecular weight and absorbance of each
+        record of an amino acid sequence file
+        """
+        labels = ["Extinction Coefficient (Secreted Protein)", "Extinction Coefficient (Cytosolic Protein)",
+                  "Molecular Weight (g/mol)", "Absorbance"]
+        for name, aa_sequence in self._records(filename):
+            secreted, cytosolic = calculate_extinction_coeff(aa_sequence, verbose=False)
+            molecular_weight = calculate_molecular_weight(aa_sequence)
+            values = [secreted, cytosolic, molecular_weight, secreted/molecular_weight]
+            if name is None:
+                for label, value in zip(labels, values):
+                    yield label+"\t"+str(value)
+            else:
+                yield name+"\t"+"\t".join(str(value) for value in values)
+
+    def design_primers(self, filename, first_residue, mutants, out_dir=None):
+        """
+        Designs primers for point mutants of a nucleotide sequence file, writing each
+        pair to out_dir/X###X_filename unless that file already exists
+        """
+        from peanut.primer_design import PrimerGenerator
+        key = (filename, first_residue)
+        if key not in self._generators:
+            self._generators[key] = PrimerGenerator(self.read_sequence(filename), first_res=first_residue)
+        designs = self._generators[key].make_mutants(mutants, verbose=False)
+
+        yield "mutant\tlength\tTm\tGC%\tcodon\tforward primer"
+        for design in designs:
+            yield (design.mutation+"\t"+str(design.length)+"\t"+"%.1f" % design.melting_temp+"\t"
+                   +"%.1f" % design.gc_percent+"\t"+design.wt_codon+">"+design.mut_codon+"\t"
+                   +design.forward_primer)
+            if out_dir is None:
+                continue
+            outfilename = os.path.join(out_dir, design.mutation+"_"+os.path.basename(filename))
+            if os.path.exists(outfilename):
+                yield "Primer file exists for "+design.mutation+"; not overwritten"
+                continue
+            with open(outfilename, 'w') as fo:
+                fo.write("Forward Primer\n")
+                fo.write(design.forward_primer)
+                fo.write("\nReverse Primer\n")
+                fo.write(design.reverse_primer)
+
+    def run(self, job):
+        """
+        Runs one job
+
+        Arguments:
+        ----------
+            job : dict
+                'command' (one of COMMANDS), 'filename' and the keyword arguments of that
+                command, with values as read from a CSV or JSON manifest
+        Returns:
+        --------
+            lines : generator of str
+                output of the job, line by line
+        """
+        job = dict((key, value) for key, value in job.items() if value not in (None, ''))
+        command = job.pop('command', None)
+        if command not in COMMANDS:
+            raise IOError("unknown command "+str(command)+"; expected one of "+", ".join(COMMANDS))
+        if 'filename' not in job:
+            raise IOError("job has no filename")
+        if 'first_residue' in job:
+            job['first_residue'] = int(job['first_residue'])
+        if 'max_mutations' in job:
+            job['max_mutations'] = int(job['max_mutations'])
+        if 'try_frames' in job:
+            job['try_frames'] = _parse_bool(job['try_frames'])
+        if isinstance(job.get('mutants'), str):
+            job['mutants'] = job['mutants'].replace(';', ' ').split()
+        return getattr(self, command.replace('-', '_'))(**job)
+
+def _parse_bool(value):
+    if isinstance(value, bool):
+        return value
+    return str(value).strip().lower() in ['1', 'true', 'yes', 'y']
+
+def read_manifest(filename):
+    """
+    Reads the jobs of a batch manifest
+
+    Arguments:
+    ----------
+        filename : str
+            .json file holding a list of job objects, or a CSV file with a header row
+    Returns:
+    --------
+        jobs : list of dict
+    """
+    with open(filename, 'r') as fi:
+        if filename.endswith('.json'):
+            jobs = json.load(fi)
+        else:
+            jobs = [dict((key.strip(), value.strip()) for key, value in row.items() if key is not None)
+                    for row in csv.DictReader(fi)]
+    if not isinstance(jobs, list) or not all(isinstance(job, dict) for job in jobs):
+        raise IOError(filename+" is not a list of jobs")
+    return jobs
+
+def run_batch(jobs, runner=None, out=None):
+    """
+    Runs many jobs in one process, sharing sequence files, caches and
+    PrimerGenerators; a failing job is reported and the rest still run
+
+    Each output line is prefixed with the index of its job and its command; a job
+    that fails part way keeps the lines it wrote before its error line
+
+    Arguments:
+    ----------
+        jobs : list of dict
+            as returned by read_manifest()
+        Optional:
+        ---------
+            runner : JobRunner
+                (default = JobRunner())
+            out : file
+                where output is written (default = sys.stdout)
+    Returns:
+    --------
+        n_failed : int
+            number of jobs that raised an error
+    """
+    if runner is None:
+        runner = JobRunner()
+    if out is None:
+        out = sys.stdout
+    n_failed = 0
+    for k, job in enumerate(jobs):
+        prefix = str(k)+"\t"+str(job.get('command'))+"\t"
+        try:
+            with instrumentation.timer('batch/'+str(job.get('command'))):
+                for line in runner.run(job):
+                    out.write(prefix+line+"\n")
+        except Exception as error:
+            n_failed += 1
+            instrumentation.warn('job_failed', str(error), job=k, command=job.get('command'))
+            out.write(prefix+"error: "+str(error)+"\n")
+    return n_failed
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='peanut', description="Little tools for DNA and protein sequences")
+    parser.add_argument('--cache-dir', default=None, help="on-disk cache directory")
+    parser.add_argument('--mmap', action='store_true', help="memory-map FASTA / FASTQ files")
+    parser.add_argument('--profile', action='store_true',
+                        help="write stage timings, counts and warnings to stderr when done")
+    commands = parser.add_subparsers(dest='command')
+    commands.required = True
+
+    translate = commands.add_parser('translate', help="translate a nucleotide sequence file")
+    translate.add_argument('filename')
+    translate.add_argument('--try-frames', action='store_true', help="pick the frame with the fewest stops")
+    translate.add_argument('--output', default=None, help="also write the amino acid sequence here")
+
+    count = commands.add_parser('count-mutants', help="count amino acid sequences reachable by point mutations")
+    count.add_argument('filename')
+    count.add_argument('--max-mutations', type=int, default=2)
+
+    constants = commands.add_parser('constants', help="extinction coefficients and molecular weight")
+    constants.add_argument('filename', help="amino acid sequence file")
+
+    primers = commands.add_parser('design-primers', help="design site-directed mutagenesis primers")
+    primers.add_argument('filename')
+    primers.add_argument('first_residue', type=int)
+    primers.add_argument('mutants', nargs='+', help="point mutations, e.g. T315I")
+    primers.add_argument('--out-dir', default=None, help="write a primer file per mutant here")
+
+    batch = commands.add_parser('batch', help="run every job of a CSV or JSON manifest")
+    batch.add_argument('manifest')
+
+    reads = commands.add_parser('translate-reads',
+                                help="translate every read in files, directories or globs on a process pool")
+    reads.add_argument('paths', nargs='+')
+    reads.add_argument('--output', required=True, help="tab-separated table of translations")
+    reads.add_argument('--workers', type=int, default=None, help="worker processes (default = every core)")
+
+    identify = commands.add_parser('identify', help="find the best matching reference protein of each read")
+    identify.add_argument('paths', nargs='+', help="nucleotide reads: files, directories or globs")
+    identify.add_argument('--references', nargs='+', required=True,
+                          help="amino acid references: files, directories or FASTA")
+    identify.add_argument('--protein', action='store_true', help="reads are already amino acid sequences")
+    identify.add_argument('--k', type=int, default=5, help="k-mer length (default = 5)")
+    identify.add_argument('--workers', type=int, default=None, help="worker processes for translation")
+
+    args = vars(parser.parse_args(argv))
+    runner = JobRunner(Cache(args.pop('cache_dir')), memory_map=args.pop('mmap'))
+    command = args.pop('command')
+    if not args.pop('profile'):
+        return _run_command(command, args, runner)
+    with instrumentation.Collector() as collector:
+        with instrumentation.timer(command):
+            status = _run_command(command, args, runner)
+    sys.stderr.write(collector.summary()+"\n")
+    return status
+
+def _run_command(command, args, runner):
+    """
+    Runs one parsed subcommand of main(), returning its exit status
+    """
+    if command == 'batch':
+        return 1 if run_batch(read_manifest(args['manifest']), runner) else 0
+    if command == 'translate-reads':
+        from peanut.batch_translation import translate_reads, write_translations
+        status_counts = write_translations(translate_reads(args['paths'], workers=args['workers'],
+                                                           memory_map=runner.memory_map), args['output'])
+        for status in sorted(status_counts):
+            print(status+"\t"+str(status_counts[status]))
+        return 0
+    if command == 'identify':
+        from peanut.identify import ReferenceIndex
+        index = ReferenceIndex.from_paths(args['references'], k=args['k'])
+        if args['protein']:
+            from peanut.batch_translation import expand_paths
+            queries = ((filename, record.name, record.sequence) for filename in expand_paths(args['paths'])
+                       for record in read_sequences(filename, memory_map=runner.memory_map))
+        else:
+            from peanut.batch_translation import translate_reads
+            queries = ((read.filename, read.name, read.aa_sequence)
+                       for read in translate_reads(args['paths'], workers=args['workers'],
+                                                   memory_map=runner.memory_map))
+        print("filename\tname\treference\tidentity\tcoverage\toffset")
+        for filename, name, aa_sequence in queries:
+            identifications = index.identify(aa_sequence) if aa_sequence else []
+            if identifications:
+                best = identifications[0]
+                print(filename+"\t"+str(name)+"\t"+best.reference+"\t"+"%.4f" % best.identity+"\t"
+                      +"%.4f" % best.coverage+"\t"+str(best.offset))
+            else:
+                print(filename+"\t"+str(name)+"\t\t\t\t")
+        return 0
+    for line in runner.run(dict(args, command=command)):
+        print(line)
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
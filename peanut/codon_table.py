@@ -0,0 +1,185 @@
+"""
+Translates nucleotide sequences with codon tables indexed by 2-bit encoded bases,
+instead of building scikit-bio GeneticCode and sequence objects
+
+Gives the same residues as scikit-bio genetic_code(11).translate(): DNA and RNA are
+both accepted in either case, and any codon containing a base other than A, C, G,
+T or U translates to 'X'
+
+Dependencies:
+    Requires NumPy
+"""
+import numpy as np
+
+BASES = 'ACGT'
+
+# all 64 codons, in 2-bit code order: A=0, C=1, G=2, T=3, first base most significant
+CODONS = [a+b+c for a in BASES for b in BASES for c in BASES]
+
+# NCBI translation table 11 (bacterial, archaeal and plant plastid code), one
+# residue per entry of CODONS
+CODON_TABLE = 'KNKNTTTTRSRSIIMIQHQHPPPPRRRRLLLLEDEDAAAAGGGGVVVV*Y*YSSSS*CWCLFLF'
+
+# code given to any character that is not a nucleotide
+UNKNOWN_BASE = 4
+# codon_index() of any codon containing an unknown base
+UNKNOWN_CODON = 64
+
+# ASCII value -> 2-bit nucleotide code
+NUCLEOTIDE_CODES = np.full(256, UNKNOWN_BASE, dtype=np.uint8)
+for _code, _bases in enumerate(['Aa', 'Cc', 'Gg', 'TtUu']):
+    for _base in _bases:
+        NUCLEOTIDE_CODES[ord(_base)] = _code
+
+# 2-bit code -> code of the complementary base
+COMPLEMENT_CODES = np.array([3, 2, 1, 0, UNKNOWN_BASE], dtype=np.uint8)
+
+# ASCII residue for every triple of codes including UNKNOWN_BASE, indexed by
+# 25*code1 + 5*code2 + code3, so translation never leaves uint8
+RESIDUES_BY_CODES = np.full(125, ord('X'), dtype=np.uint8)
+for _index, _codon in enumerate(CODONS):
+    _codes = [BASES.index(_base) for _base in _codon]
+    RESIDUES_BY_CODES[25*_codes[0] + 5*_codes[1] + _codes[2]] = ord(CODON_TABLE[_index])
+
+# residue -> codons translating to it, in CODONS order
+SYNONYMS = {}
+for _codon, _residue in zip(CODONS, CODON_TABLE):
+    SYNONYMS.setdefault(_residue, []).append(_codon)
+
+# number of differing bases between every pair of codons, indexed by position in CODONS
+CODON_DISTANCES = np.array([[sum(base1 != base2 for base1, base2 in zip(codon1, codon2)) for codon2 in CODONS]
+                            for codon1 in CODONS], dtype=np.uint8)
+
+# complementary base for DNA and RNA in either case; anything else is kept
+_COMPLEMENTS = {ord(base): complement for base, complement in zip('ACGTUNacgtun', 'TGCAANtgcaan')}
+
+
+def encode(sequence):
+    """
+    Encodes a nucleotide sequence as 2-bit codes
+
+    Arguments:
+    ----------
+        sequence : str
+            DNA or RNA nucleotide sequence
+    Returns:
+    --------
+        codes : numpy.ndarray of uint8
+            one code per nucleotide; A=0, C=1, G=2, T/U=3, anything else UNKNOWN_BASE
+    """
+    return NUCLEOTIDE_CODES[np.frombuffer(sequence.encode('ascii'), dtype=np.uint8)]
+
+
+def reverse_complement_codes(codes):
+    """
+    Reverse complements a sequence of 2-bit nucleotide codes
+
+    Arguments:
+    ----------
+        codes : numpy.ndarray of uint8
+            as returned by encode()
+    Returns:
+    --------
+        rc_codes : numpy.ndarray of uint8
+            codes of the reverse complement strand; unknown bases stay unknown
+    """
+    return COMPLEMENT_CODES[codes[::-1]]
+
+
+def translate_codes(codes):
+    """
+    Translates 2-bit nucleotide codes to residues, reading codons from the start of
+    the last axis
+
+    Arguments:
+    ----------
+        codes : numpy.ndarray of uint8
+            as returned by encode(), or stacked along leading axes for many sequences;
+            trailing nucleotides that do not fill a codon are ignored
+    Returns:
+    --------
+        residues : numpy.ndarray of uint8
+            ASCII one-letter amino acid code per codon
+    """
+    n_codons = codes.shape[-1]//3
+    codons = codes[..., :n_codons*3].reshape(codes.shape[:-1]+(n_codons, 3))
+    return RESIDUES_BY_CODES[codons[..., 0]*np.uint8(25) + codons[..., 1]*np.uint8(5) + codons[..., 2]]
+
+
+def translate(sequence, start=0):
+    """
+    Translates a nucleotide sequence to amino acid sequence
+
+    Arguments:
+    ----------
+        sequence : str
+            DNA or RNA nucleotide sequence
+        Optional:
+        ---------
+            start : int
+                index of the first nucleotide of the first codon (default = 0)
+    Returns:
+    --------
+        aa_sequence : str
+            sequence of one-letter amino acid codes
+    """
+    return translate_codes(encode(sequence[start:])).tobytes().decode('ascii')
+
+
+def reverse_complement(sequence):
+    """
+    Reverse complements a nucleotide sequence, keeping the case of each base
+
+    Arguments:
+    ----------
+        sequence : str
+            DNA or RNA nucleotide sequence
+    Returns:
+    --------
+        rc_sequence : str
+            DNA reverse complement; characters other than A, C, G, T, U and N are kept
+    """
+    return sequence[::-1].translate(_COMPLEMENTS)
+
+
+def codon_index(codon):
+    """
+    Returns the position of a codon in CODONS
+
+    Arguments:
+    ----------
+        codon : str
+            len(codon) = 3, DNA or RNA in either case
+    Returns:
+    --------
+        index : int
+            UNKNOWN_CODON if codon is not 3 nucleotides of A, C, G, T or U
+    """
+    if len(codon) != 3:
+        return UNKNOWN_CODON
+    index = 0
+    for base in codon:
+        code = NUCLEOTIDE_CODES[ord(base)] if ord(base) < 256 else UNKNOWN_BASE
+        if code == UNKNOWN_BASE:
+            return UNKNOWN_CODON
+        index = index*4 + int(code)
+    return index
+
+
+def translate_codon(codon):
+    """
+    Translates a single codon
+
+    Arguments:
+    ----------
+        codon : str
+            len(codon) = 3
+    Returns:
+    --------
+        residue : str
+            one-letter amino acid code, '*' for stop, 'X' if the codon is not valid
+    """
+    index = codon_index(codon)
+    if index == UNKNOWN_CODON:
+        return 'X'
+    return CODON_TABLE[index]
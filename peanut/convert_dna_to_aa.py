@@ -5,11 +5,19 @@ DNA sequence (can be used if multiple translations will be performed) or
 externally by directly inputing a DNA sequence
 
 Dependencies:
-    Requires scikit-bio
-        https://github.com/biocore/scikit-bio
+    Requires NumPy
 """
-from skbio.sequence import genetic_code
-from skbio.sequence import DNASequence
+import bisect
+from collections import namedtuple
+import itertools
+
+import numpy as np
+
+from peanut import instrumentation
+from peanut.codon_table import CODONS, CODON_TABLE, NUCLEOTIDE_CODES
+from peanut.codon_table import encode, reverse_complement_codes
+from peanut.codon_table import translate, translate_codes, translate_codon
+from peanut.mutant_set import MutantSet, DELTA_DTYPE, NO_POSITION
 
 class SequenceConverter(object):
     """
@@ -23,16 +31,24 @@ class SequenceConverter(object):
         dna_to_aa()
             translates from the input DNA nucleotide sequence to amino acid sequence
             saves self.aa_sequence
+        scan_frames()
+            translates all 6 reading frames, with stop codon positions and the longest
+            open reading frame of each
         all_dna_point_mutants_to_aa()
             finds unique amino acid sequences that can be achieved by making a single
             nucleotide mutation and translating the new nucleotide sequence to amino
             acid sequence
-            returns set of strings
+            returns set of strings, or a MutantSet if compact=True
         two_dna_point_mutants_to_aa()
             finds unique amino acid sequences that can be achieved by making 2 nucleotide
             mutations and translating the new nucleotide sequence to amino acid sequence
-            runs using nesting loops through every nucleotide in the sequence twice : VERY SLOW
-            returns set of strings
+            only retranslates the affected codons of each mutant
+            returns set of strings, or a MutantSet if compact=True
+        point_mutants_to_aa()
+            the same for any number of nucleotide mutations, e.g. 3
+        iter_dna_point_mutants_to_aa(), iter_two_dna_point_mutants_to_aa(),
+        iter_point_mutants_to_aa()
+            as above, but yield each unique sequence (or its deltas) as it is found
     """
     def __init__(self, wt_dna_sequence):
         """
@@ -63,38 +79,156 @@ class SequenceConverter(object):
         aa_sequence = dna_to_aa(self.wt_dna_sequence, try_frames=try_frames)
         self.aa_sequence = aa_sequence
         return aa_sequence
+
+    def scan_frames(self):
+        """
+        Translates all 6 reading frames of the input DNA nucleotide sequence, finding
+        the stop codons and the longest open reading frame in each
+
+        Returns:
+        --------
+            frames : list of FrameTranslation
+        """
+        return scan_frames(self.wt_dna_sequence)
     
-    def all_dna_point_mutants_to_aa(self):
+    def all_dna_point_mutants_to_aa(self, compact=False):
         """
         Finds all potential sequences which can be achieved by making a single nucleotide
         mutation and translating to amino acid sequence
         Ignores mutations that lead to nonsense instead of missense mutations
         Assumes self.wt_dna_sequence starts on the correct reading frame
-        
+
+        Arguments:
+        ----------
+            Optional:
+            ---------
+                compact : Bool
+                    if True, return a MutantSet of deltas against the wild type
+                    instead of a set of full sequences
+                    default = False
         Returns:
         --------
-            aa_sequences : set of str
+            aa_sequences : set of str, or MutantSet
                 each str is a unique sequence of one-letter amino acid codes
         """
-        aa_sequences = all_dna_point_mutants_to_aa(self.wt_dna_sequence)
+        aa_sequences = all_dna_point_mutants_to_aa(self.wt_dna_sequence, compact=compact)
         return aa_sequences
 
-    def two_dna_point_mutants_to_aa(self):
+    def two_dna_point_mutants_to_aa(self, compact=False, workers=None):
         """
         Finds all potential sequences which can be achieved by making 2 nucleotide
         mutations and translating to amino acid sequence
         Ignores mutations that lead to nonsense instead of missense mutations
         Assumes self.wt_dna_sequence starts on the correct reading frame
-        
+
+        Arguments:
+        ----------
+            Optional:
+            ---------
+                compact : Bool
+                    if True, return a MutantSet of deltas against the wild type
+                    instead of a set of full sequences
+                    default = False
+                workers : int
+                    if given, split the work across this many processes
+                    default = None
         Returns:
         --------
-            aa_sequences : set of str
+            aa_sequences : set of str, or MutantSet
                 each str is a unique sequence of one-letter amino acid codes
         """
 
-        aa_sequences = two_dna_point_mutants_to_aa(self.wt_dna_sequence)
+        aa_sequences = two_dna_point_mutants_to_aa(self.wt_dna_sequence, compact=compact, workers=workers)
         return aa_sequences
 
+    def point_mutants_to_aa(self, max_mutations, compact=False, workers=None):
+        """
+        Finds all potential sequences which can be achieved by making up to
+        max_mutations nucleotide mutations and translating to amino acid sequence
+        Ignores mutations that lead to nonsense instead of missense mutations
+        Assumes self.wt_dna_sequence starts on the correct reading frame
+
+        Arguments:
+        ----------
+            max_mutations : int
+                maximum number of nucleotide mutations, e.g. 1, 2 or 3 (at least 1)
+            Optional:
+            ---------
+                compact : Bool
+                    if True, return a MutantSet of deltas against the wild type
+                    instead of a set of full sequences
+                    default = False
+                workers : int
+                    if given, split the work across this many processes
+                    default = None
+        Returns:
+        --------
+            aa_sequences : set of str, or MutantSet
+                each str is a unique sequence of one-letter amino acid codes
+        """
+        aa_sequences = point_mutants_to_aa(self.wt_dna_sequence, max_mutations, compact=compact, workers=workers)
+        return aa_sequences
+
+    def iter_dna_point_mutants_to_aa(self, deltas=False):
+        """
+        Yields all potential sequences which can be achieved by making a single
+        nucleotide mutation and translating to amino acid sequence, as they are found
+        Assumes self.wt_dna_sequence starts on the correct reading frame
+
+        Arguments:
+        ----------
+            Optional:
+            ---------
+                deltas : Bool
+                    if True, yield (position, new residue) deltas instead of sequences
+                    default = False
+        Yields:
+        -------
+            aa_sequence : str, or tuple of (int, str)
+        """
+        return iter_dna_point_mutants_to_aa(self.wt_dna_sequence, deltas=deltas)
+
+    def iter_two_dna_point_mutants_to_aa(self, deltas=False):
+        """
+        Yields all potential sequences which can be achieved by making up to 2
+        nucleotide mutations and translating to amino acid sequence, as they are found
+        Assumes self.wt_dna_sequence starts on the correct reading frame
+
+        Arguments:
+        ----------
+            Optional:
+            ---------
+                deltas : Bool
+                    if True, yield (position, new residue) deltas instead of sequences
+                    default = False
+        Yields:
+        -------
+            aa_sequence : str, or tuple of (int, str)
+        """
+        return iter_two_dna_point_mutants_to_aa(self.wt_dna_sequence, deltas=deltas)
+
+    def iter_point_mutants_to_aa(self, max_mutations, deltas=False):
+        """
+        Yields all potential sequences which can be achieved by making up to
+        max_mutations nucleotide mutations and translating to amino acid sequence, as
+        they are found
+        Assumes self.wt_dna_sequence starts on the correct reading frame
+
+        Arguments:
+        ----------
+            max_mutations : int
+                maximum number of nucleotide mutations, at least 1
+            Optional:
+            ---------
+                deltas : Bool
+                    if True, yield (position, new residue) deltas instead of sequences
+                    default = False
+        Yields:
+        -------
+            aa_sequence : str, or tuple of (int, str)
+        """
+        return iter_point_mutants_to_aa(self.wt_dna_sequence, max_mutations, deltas=deltas)
+
 def dna_to_aa(sequence, try_frames=False):
     """
     Translates from the input DNA nucleotide sequence to amino acid sequence
@@ -114,101 +248,807 @@ def dna_to_aa(sequence, try_frames=False):
         aa_sequence : str
             sequence of one-letter amino acid codes
     """
-    orig_code = genetic_code(11)
-
+    if instrumentation.active:
+        instrumentation.count('sequences_translated')
     if not try_frames:
-        return orig_code.translate(sequence).sequence
+        return translate(sequence)
+
+    frames = scan_frames(sequence)
+    stops = [len(frame.stop_positions) for frame in frames]
 
-    sequence = DNASequence(sequence)
-    translated = orig_code.translate_six_frames(sequence)
-    stops = [aastring.sequence.count('*') for aastring in translated]
+    return frames[stops.index(min(stops))].aa_sequence
 
-    return translated[stops.index(min(stops))].sequence
 
+# translation of one of the six reading frames of a nucleotide sequence
+#     frame : index 0-5, forward frames first (as scikit-bio translate_six_frames)
+#     strand : '+' for the input sequence, '-' for its reverse complement
+#     offset : index of the first nucleotide of the first codon on that strand
+#     aa_sequence : str of one-letter amino acid codes
+#     stop_positions : numpy.ndarray of the residue indices of stop codons
+#     longest_orf : (start, end) residue indices of the longest stretch without a
+#         stop codon, such that aa_sequence[start:end] is that stretch
+FrameTranslation = namedtuple('FrameTranslation',
+                              ['frame', 'strand', 'offset', 'aa_sequence', 'stop_positions', 'longest_orf'])
 
-def all_dna_point_mutants_to_aa(wt_sequence):
+
+def scan_frames(sequence):
     """
-    Finds all potential sequences which can be achieved by making a single nucleotide
-    mutation and translating to amino acid sequence
+    Translates all 6 reading frames of a nucleotide sequence, finding the stop codons
+    and the longest open reading frame in each
+
+    The sequence is encoded once and its reverse complement is taken on the codes, so
+    each frame is a single codon table lookup
+
+    Arguments:
+    ----------
+        sequence : str
+            DNA or RNA nucleotide sequence
+    Returns:
+    --------
+        frames : list of FrameTranslation
+            frames 0, 1 and 2 read the input from offsets 0, 1 and 2; frames 3, 4 and 5
+            read the reverse complement from offsets 0, 1 and 2
+    """
+    codes = encode(sequence)
+    rc_codes = reverse_complement_codes(codes)
+    frames = []
+    for strand, strand_codes in [('+', codes), ('-', rc_codes)]:
+        for offset in range(3):
+            residues = translate_codes(strand_codes[offset:])
+            stop_positions = np.flatnonzero(residues == ord('*'))
+            boundaries = np.concatenate([[-1], stop_positions, [len(residues)]])
+            longest = int(np.argmax(np.diff(boundaries)))
+            longest_orf = (int(boundaries[longest])+1, int(boundaries[longest+1]))
+            frames.append(FrameTranslation(len(frames), strand, offset, residues.tobytes().decode('ascii'),
+                                           stop_positions, longest_orf))
+    return frames
+
+
+def translate_six_frames(sequence):
+    """
+    Translates all 6 reading frames of a nucleotide sequence
+
+    Arguments:
+    ----------
+        sequence : str
+            DNA or RNA nucleotide sequence
+    Returns:
+    --------
+        aa_sequences : list of str
+            in the order of scikit-bio translate_six_frames: the input read from
+            offsets 0, 1 and 2, then its reverse complement read from offsets 0, 1 and 2
+    """
+    return [frame.aa_sequence for frame in scan_frames(sequence)]
+
+
+def pad_sequences(sequences):
+    """
+    Packs nucleotide sequences of different lengths into one array, one row each
+
+    Arguments:
+    ----------
+        sequences : list of str
+            DNA or RNA nucleotide sequences
+    Returns:
+    --------
+        array : numpy.ndarray of uint8, shape (n_sequences, max_length)
+            ASCII nucleotides, padded with 0 after the end of each sequence
+        lengths : numpy.ndarray of int, shape (n_sequences,)
+            number of nucleotides in each sequence
+    """
+    lengths = np.array([len(sequence) for sequence in sequences], dtype=np.intp)
+    array = np.zeros((len(sequences), lengths.max() if len(sequences) else 0), dtype=np.uint8)
+    nucleotides = np.frombuffer("".join(sequences).encode('ascii'), dtype=np.uint8)
+    rows = np.repeat(np.arange(len(sequences)), lengths)
+    starts = np.cumsum(lengths)-lengths
+    array[rows, np.arange(len(nucleotides))-starts[rows]] = nucleotides
+    return array, lengths
+
+
+def translate_batch(sequences, lengths=None):
+    """
+    Translates many nucleotide sequences at once, all reading from their first
+    nucleotide, with one codon table lookup over the whole batch
+
+    Arguments:
+    ----------
+        sequences : numpy.ndarray of uint8, shape (n_sequences, max_length), or list of str
+            ASCII nucleotides, one sequence per row; shorter sequences are padded with 0
+            (see pad_sequences())
+        Optional:
+        ---------
+            lengths : numpy.ndarray of int, shape (n_sequences,)
+                number of nucleotides in each row; if not given, each row ends at its
+                first 0 byte
+    Returns:
+    --------
+        residues : numpy.ndarray of uint8, shape (n_sequences, max_length//3)
+            ASCII one-letter amino acid codes, 0 past the last complete codon of a row
+        mask : numpy.ndarray of bool, shape (n_sequences, max_length//3)
+            True where a row has a complete codon; residues[k][mask[k]].tobytes()
+            is the translation of sequence k
+    """
+    if not isinstance(sequences, np.ndarray):
+        sequences, lengths = pad_sequences(sequences)
+    sequences = np.asarray(sequences, dtype=np.uint8)
+    if sequences.ndim != 2:
+        raise ValueError("sequences must be a 2-D array with one sequence per row")
+    if lengths is None:
+        padding = sequences == 0
+        lengths = np.where(padding.any(axis=1), padding.argmax(axis=1), sequences.shape[1])
+    if instrumentation.active:
+        instrumentation.count('sequences_translated', len(sequences))
+    residues = translate_codes(NUCLEOTIDE_CODES[sequences])
+    mask = np.arange(residues.shape[1]) < (np.asarray(lengths)//3)[:, np.newaxis]
+    residues[~mask] = 0
+    return residues, mask
+
+
+def _codon_distances(wt_sequence):
+    """
+    Translates the wild type codon by codon and finds, for every codon, the minimum
+    number of nucleotide changes within that codon needed to reach each other residue
+
+    Nonsense mutations are dropped, except at the final residue (consistent with
+    accepting a '*' as the last character of a translated mutant)
+
+    Arguments:
+    ----------
+        wt_sequence : str
+            DNA nucleotide sequence, starting on the correct reading frame
+    Returns:
+    --------
+        aa_sequence : str
+            translated wild type
+        distances : list of dict
+            one dict per residue position, mapping each reachable residue (other than
+            wild type) to the minimum number of nucleotide changes (1, 2 or 3)
+        wt_stops : set of int
+            positions of stop codons in the wild type before the final residue
+    """
+    codon_residues = list(zip(CODONS, CODON_TABLE))
+
+    n_codons = len(wt_sequence)//3
+    aa_sequence = ""
+    distances = []
+    wt_stops = set()
+    cache = {}
+    for position in range(n_codons):
+        codon = wt_sequence[position*3:position*3+3]
+        last = position == n_codons-1
+        if (codon, last) not in cache:
+            wt_res = translate_codon(codon)
+            wt_codon = codon.upper().replace('U', 'T')
+            residue_distances = {}
+            for mutant, residue in codon_residues:
+                if residue == wt_res or (residue == '*' and not last):
+                    continue
+                distance = sum(1 for x, y in zip(wt_codon, mutant) if x != y)
+                if distance < residue_distances.get(residue, 4):
+                    residue_distances[residue] = distance
+            cache[(codon, last)] = wt_res, residue_distances
+        wt_res, residue_distances = cache[(codon, last)]
+        aa_sequence += wt_res
+        if wt_res == '*' and not last:
+            wt_stops.add(position)
+        distances.append(residue_distances)
+    return aa_sequence, distances, wt_stops
+
+
+def _codon_options(wt_sequence, max_mutations):
+    """
+    Finds, for every codon, the residues it can be mutated to with up to
+    max_mutations changes within that codon, and the minimum number of changes each
+    needs
+
+    Synonymous codons collapse to one option per residue, and stop codons are not
+    options (except at the final residue), so distinct choices of options are
+    distinct mutants
+
+    Arguments:
+    ----------
+        wt_sequence : str
+            DNA nucleotide sequence, starting on the correct reading frame
+        max_mutations : int
+            maximum number of nucleotide mutations
+    Returns:
+    --------
+        aa_sequence : str
+            translated wild type
+        options : list of list of (str, int)
+            one list per residue position of (residue, minimum number of changes) for
+            every residue other than wild type, sorted by residue
+        wt_stops : set of int
+            positions of stop codons in the wild type before the final residue
+    """
+    # every enumerator and count_point_mutants() start here, so they all reject the
+    # same values
+    if max_mutations < 1:
+        raise ValueError("max_mutations must be at least 1, not "+str(max_mutations))
+    aa_sequence, distances, wt_stops = _codon_distances(wt_sequence)
+    options = [sorted((residue, distance) for residue, distance in residue_distances.items()
+                      if distance <= max_mutations)
+               for residue_distances in distances]
+    return aa_sequence, options, wt_stops
+
+
+@instrumentation.timed
+def count_point_mutants(wt_sequence, max_mutations=2):
+    """
+    Counts the unique amino acid sequences which can be achieved by making up to
+    max_mutations nucleotide mutations, without building any of the sequences
     Ignores mutations that lead to nonsense instead of missense mutations
     Assumes wt_sequence starts on the correct reading frame
-        
+
+    A mutant is reachable if the minimum number of changes needed at each mutated
+    codon sums to at most max_mutations. The count is the sum of the first
+    max_mutations+1 coefficients of the product over codons of
+    (1 + n1*x + n2*x^2 + n3*x^3), where nd is the number of residues that codon
+    reaches with a minimum of d changes
+
     Arguments:
     ----------
         wt_sequence : str
             DNA nucleotide sequence
+        Optional:
+        ---------
+            max_mutations : int
+                maximum number of nucleotide mutations, at least 1 (default = 2)
     Returns:
     --------
-        AA_sequences : set of str
-            each str is a unique sequence of one-letter amino acid codes
+        n_sequences : int
+            number of unique sequences, including the wild type; equal to
+            len(all_dna_point_mutants_to_aa(wt_sequence)) for max_mutations=1 and to
+            len(two_dna_point_mutants_to_aa(wt_sequence)) for max_mutations=2
+    """
+    aa_sequence, options, wt_stops = _codon_options(wt_sequence, max_mutations)
+    # coefficients[n] = number of mutants using exactly n nucleotide changes
+    coefficients = [1] + [0]*max_mutations
+    for position, position_options in enumerate(options):
+        counts = [0, 0, 0, 0]
+        for residue, distance in position_options:
+            counts[distance] += 1
+        # a stop codon inside the wild type must be mutated away
+        keep = 0 if position in wt_stops else 1
+        coefficients = [keep*coefficients[n] + sum(counts[d]*coefficients[n-d] for d in range(1, min(n, 3)+1))
+                        for n in range(max_mutations+1)]
+    n_sequences = sum(coefficients)
+    if wt_stops:
+        # the wild type itself is always included
+        n_sequences += 1
+    return n_sequences
+
+
+def apply_deltas(aa_sequence, deltas):
     """
-    AA_sequences = set()
-    orig_code = genetic_code(11)
-    AA_sequences.add(orig_code.translate(wt_sequence).sequence)
+    Builds the amino acid sequence of a mutant from the wild type and its deltas
 
-    for k, char in enumerate(wt_sequence):
-        for mutant in ['A','C','G','U']:
-            if mutant == char:
+    Arguments:
+    ----------
+        aa_sequence : str
+            wild type sequence of one-letter amino acid codes
+        deltas : tuple of (int, str)
+            (position, new residue) pairs, sorted by position; positions are 0-indexed
+            into aa_sequence
+    Returns:
+    --------
+        mutant_sequence : str
+            sequence of one-letter amino acid codes
+    """
+    pieces = []
+    last = 0
+    for position, residue in deltas:
+        pieces.append(aa_sequence[last:position])
+        pieces.append(residue)
+        last = position+1
+    pieces.append(aa_sequence[last:])
+    return "".join(pieces)
+
+
+def _iter_mutant_deltas(options, wt_stops, max_mutations, positions=None):
+    """
+    Iterates over the deltas of every mutant reachable with up to max_mutations
+    nucleotide mutations, each exactly once
+
+    Mutations are grouped by codon: a mutant picks codons at increasing positions and
+    one option of each, costing the option's minimum number of changes. A branch is
+    pruned as soon as the changes left cannot pay for another codon, or cannot mutate
+    away every stop codon of the wild type still ahead of it, and it never skips over
+    such a stop. Options never repeat a residue or hold the wild type residue, so
+    distinct delta tuples are distinct sequences and no global record of what was
+    seen is needed
+
+    Mutants come out in a canonical order: the wild type, then for each position in
+    turn every mutant whose first delta is at that position, depth first
+
+    Arguments:
+    ----------
+        options, wt_stops :
+            as returned by _codon_options()
+        max_mutations : int
+            maximum number of nucleotide mutations
+        Optional:
+        ---------
+            positions : iterable of int
+                only include mutants whose first delta is at one of these positions,
+                in increasing order; the wild type is then left out
+    Returns:
+    --------
+        deltas : iterator of tuple of (int, str)
+            (position, new residue) pairs, sorted by position; the empty tuple is the
+            wild type
+    """
+    wild_type = []
+    if positions is None:
+        wild_type = [()]
+        positions = range(len(options))
+    choices = [[((position, residue), distance) for residue, distance in position_options]
+               for position, position_options in enumerate(options)]
+    # every single change delta in position order, and where each position's start
+    singles = []
+    starts = []
+    for position_choices in choices:
+        starts.append(len(singles))
+        singles.extend(delta for delta, distance in position_choices if distance == 1)
+    starts.append(len(singles))
+    return itertools.chain(wild_type, _extend_deltas(choices, (singles, starts), sorted(wt_stops), (), positions, 0,
+                                                     max_mutations))
+
+
+def _extend_deltas(choices, singles, stops, prefix, positions, start, budget):
+    """
+    Does the work of _iter_mutant_deltas(): yields prefix extended by one or more
+    deltas at the given positions, all at or after start, costing at most budget
+    changes, and covering every stop in stops at or after start
+    """
+    first_stop = bisect.bisect_left(stops, start)
+    n_stops = len(stops) - first_stop
+    if n_stops > budget:
+        return
+    # the next stop codon has to be mutated, so no codon after it can come first
+    last = stops[first_stop] if n_stops else len(choices)-1
+    single_deltas, single_starts = singles
+    for position in positions:
+        if position > last:
+            break
+        complete = n_stops == 0 or (n_stops == 1 and position == last)
+        for delta, distance in choices[position]:
+            if distance > budget:
                 continue
-            if k == 0:
-                this_dna_string = ""+mutant+wt_sequence[k+1:]
-            if k > 0 and k < len(wt_sequence):
-                this_dna_string = ""+wt_sequence[0:k]+mutant+wt_sequence[k+1:]
-            if k == len(wt_sequence):
-                this_dna_string = ""+wt_sequence[0:k]+mutant
-            this_sequence = orig_code.translate(this_dna_string).sequence
-            if '*' in this_sequence[:-1]:
+            deltas = prefix + (delta,)
+            if complete:
+                yield deltas
+                if distance+1 == budget:
+                    # one change left, which any single change after this codon uses
+                    for single in single_deltas[single_starts[position+1]:]:
+                        yield deltas + (single,)
+                    continue
+            if distance < budget:
+                for longer in _extend_deltas(choices, singles, stops, deltas, range(position+1, len(choices)),
+                                             position+1, budget-distance):
+                    yield longer
+
+
+def point_mutant_deltas(wt_sequence, max_mutations):
+    """
+    Finds all amino acid mutants which can be achieved by making up to max_mutations
+    nucleotide mutations, as deltas against the translated wild type
+    Ignores mutations that lead to nonsense instead of missense mutations
+    Assumes wt_sequence starts on the correct reading frame
+
+    Several mutations may fall in the same codon, in which case that codon counts the
+    minimum number of changes needed for its new residue. Only mutated codons are
+    retranslated, so work scales with the number of mutants instead of with the
+    sequence length times the number of mutants
+
+    Arguments:
+    ----------
+        wt_sequence : str
+            DNA nucleotide sequence
+        max_mutations : int
+            maximum number of nucleotide mutations, at least 1
+    Returns:
+    --------
+        aa_sequence : str
+            translated wild type
+        deltas : set of tuple
+            each tuple holds the (position, new residue) pairs of one unique mutant,
+            sorted by position; the empty tuple is the wild type
+    """
+    aa_sequence, options, wt_stops = _codon_options(wt_sequence, max_mutations)
+    deltas = set(_iter_mutant_deltas(options, wt_stops, max_mutations))
+    return aa_sequence, deltas
+
+
+def dna_point_mutant_deltas(wt_sequence):
+    """
+    Finds all amino acid mutants which can be achieved by making a single nucleotide
+    mutation, as deltas against the translated wild type
+    Equivalent to point_mutant_deltas(wt_sequence, 1)
+
+    Arguments:
+    ----------
+        wt_sequence : str
+            DNA nucleotide sequence
+    Returns:
+    --------
+        aa_sequence : str
+            translated wild type
+        deltas : set of tuple
+            each tuple holds the (position, new residue) pairs of one unique mutant;
+            the empty tuple is the wild type
+    """
+    return point_mutant_deltas(wt_sequence, 1)
+
+
+def two_dna_point_mutant_deltas(wt_sequence):
+    """
+    Finds all amino acid mutants which can be achieved by making up to 2 nucleotide
+    mutations, as deltas against the translated wild type
+    Equivalent to point_mutant_deltas(wt_sequence, 2)
+
+    Arguments:
+    ----------
+        wt_sequence : str
+            DNA nucleotide sequence
+    Returns:
+    --------
+        aa_sequence : str
+            translated wild type
+        deltas : set of tuple
+            each tuple holds the (position, new residue) pairs of one unique mutant,
+            sorted by position; the empty tuple is the wild type
+    """
+    return point_mutant_deltas(wt_sequence, 2)
+
+
+def iter_point_mutants_to_aa(wt_sequence, max_mutations, deltas=False):
+    """
+    Yields all potential sequences which can be achieved by making up to
+    max_mutations nucleotide mutations and translating to amino acid sequence, one
+    at a time as they are found
+    Ignores mutations that lead to nonsense instead of missense mutations
+    Assumes wt_sequence starts on the correct reading frame
+
+    Every sequence is yielded exactly once, and nothing is kept between them, so
+    memory does not grow with the number of mutants; this is the way to walk e.g.
+    the ~5e8 triple mutants of a kinase domain (count them first with
+    count_point_mutants())
+
+    Arguments:
+    ----------
+        wt_sequence : str
+            DNA nucleotide sequence
+        max_mutations : int
+            maximum number of nucleotide mutations, at least 1
+        Optional:
+        ---------
+            deltas : Bool
+                if True, yield (position, new residue) deltas against the translated
+                wild type instead of full sequences
+                default = False
+    Yields:
+    -------
+        aa_sequence : str, or tuple of (int, str)
+            the wild type is yielded first (as () when deltas=True)
+    """
+    aa_sequence, options, wt_stops = _codon_options(wt_sequence, max_mutations)
+    for delta in _iter_mutant_deltas(options, wt_stops, max_mutations):
+        yield delta if deltas else apply_deltas(aa_sequence, delta)
+
+
+def iter_dna_point_mutants_to_aa(wt_sequence, deltas=False):
+    """
+    Yields all potential sequences which can be achieved by making a single nucleotide
+    mutation and translating to amino acid sequence, one at a time as they are found
+    Equivalent to iter_point_mutants_to_aa(wt_sequence, 1, deltas)
+
+    Arguments:
+    ----------
+        wt_sequence : str
+            DNA nucleotide sequence
+        Optional:
+        ---------
+            deltas : Bool
+                if True, yield (position, new residue) deltas against the translated
+                wild type instead of full sequences
+                default = False
+    Yields:
+    -------
+        aa_sequence : str, or tuple of (int, str)
+            the wild type is yielded first (as () when deltas=True)
+    """
+    return iter_point_mutants_to_aa(wt_sequence, 1, deltas=deltas)
+
+
+def iter_two_dna_point_mutants_to_aa(wt_sequence, deltas=False):
+    """
+    Yields all potential sequences which can be achieved by making up to 2 nucleotide
+    mutations and translating to amino acid sequence, one at a time as they are found
+    Equivalent to iter_point_mutants_to_aa(wt_sequence, 2, deltas)
+
+    Arguments:
+    ----------
+        wt_sequence : str
+            DNA nucleotide sequence
+        Optional:
+        ---------
+            deltas : Bool
+                if True, yield (position, new residue) deltas against the translated
+                wild type instead of full sequences
+                default = False
+    Yields:
+    -------
+        aa_sequence : str, or tuple of (int, str)
+            the wild type is yielded first (as () when deltas=True)
+    """
+    return iter_point_mutants_to_aa(wt_sequence, 2, deltas=deltas)
+
+
+def _mutant_delta_array(options, wt_stops, max_mutations, positions):
+    """
+    Builds the rows of deltas of every mutant whose first delta is at one of the given
+    positions, directly from the per-codon options, without going through Python
+    tuples
+
+    Mutants costing up to b changes are the options of a first codon, alone or
+    followed by any mutant costing up to b minus that option's changes whose first
+    delta comes later. Those shorter mutants are built first, for every b below
+    max_mutations, with rows ordered by first position, so the ones following a
+    codon are a contiguous tail of their array and each block of rows is one
+    repeat / tile
+
+    Arguments:
+    ----------
+        options, wt_stops :
+            as returned by _codon_options()
+        max_mutations : int
+            maximum number of nucleotide mutations
+        positions : iterable of int
+            first positions to build mutants for, in increasing order
+    Returns:
+    --------
+        deltas : numpy.ndarray of DELTA_DTYPE, shape (n_mutants, max_mutations)
+            rows for the selected mutants, not including the wild type
+    """
+    # tails[b] = (rows of every mutant costing 1 to b changes, index of the first row
+    # with its first delta at each position)
+    tails = {}
+    for budget in range(1, max_mutations):
+        rows = _delta_blocks(options, tails, budget, range(len(options)))
+        tails[budget] = rows, np.searchsorted(rows['position'][:, 0], np.arange(len(options)+1))
+    deltas = _delta_blocks(options, tails, max_mutations, positions)
+
+    if wt_stops:
+        # every stop codon inside the wild type has to be mutated away
+        keep = np.ones(len(deltas), dtype=bool)
+        for position in wt_stops:
+            keep &= np.any(deltas['position'] == position, axis=1)
+        deltas = deltas[keep]
+    return deltas
+
+
+def _delta_blocks(options, tails, budget, positions):
+    """
+    Does the work of _mutant_delta_array() for one budget of changes, ignoring stop
+    codons in the wild type
+    """
+    blocks = [np.empty((0, budget), dtype=DELTA_DTYPE)]
+    for i in positions:
+        singles = [residue for residue, distance in options[i] if distance <= budget]
+        block = np.empty((len(singles), budget), dtype=DELTA_DTYPE)
+        block['position'] = NO_POSITION
+        block['residue'] = b''
+        block['position'][:, 0] = i
+        block['residue'][:, 0] = singles
+        blocks.append(block)
+        for distance in range(1, budget):
+            firsts = [residue for residue, option_distance in options[i] if option_distance == distance]
+            rows, starts = tails[budget-distance]
+            rest = rows[starts[i+1]:]
+            if not firsts or not len(rest):
                 continue
-            else:
-                AA_sequences.add(this_sequence)
+            block = np.empty((len(firsts)*len(rest), budget), dtype=DELTA_DTYPE)
+            block['position'] = NO_POSITION
+            block['residue'] = b''
+            block['position'][:, 0] = i
+            block['residue'][:, 0] = np.repeat(np.array(firsts, dtype='S1'), len(rest))
+            block[:, 1:budget-distance+1] = np.tile(rest, (len(firsts), 1))
+            blocks.append(block)
+    return np.concatenate(blocks)
+
+
+def _wild_type_row(max_mutations):
+    row = np.empty((1, max_mutations), dtype=DELTA_DTYPE)
+    row['position'] = NO_POSITION
+    row['residue'] = b''
+    return row
+
+
+def _compact_point_mutants(wt_sequence, max_mutations):
+    """
+    Builds the MutantSet of all mutants reachable with up to max_mutations nucleotide
+    mutations
+
+    Arguments:
+    ----------
+        wt_sequence : str
+            DNA nucleotide sequence
+        max_mutations : int
+            maximum number of nucleotide mutations
+    Returns:
+    --------
+        mutant_set : MutantSet
+    """
+    aa_sequence, options, wt_stops = _codon_options(wt_sequence, max_mutations)
+    deltas = _mutant_delta_array(options, wt_stops, max_mutations, range(len(options)))
+    return MutantSet(aa_sequence, np.concatenate([_wild_type_row(max_mutations), deltas]))
+
+
+def _mutant_chunk(arguments):
+    """
+    Worker for _parallel_point_mutants(): builds the mutants whose first delta is at
+    one of a chunk of positions
+
+    Arguments:
+    ----------
+        arguments : tuple
+            (aa_sequence, options, wt_stops, max_mutations, positions, compact)
+    Returns:
+    --------
+        mutants : numpy.ndarray of DELTA_DTYPE if compact, otherwise list of str
+    """
+    aa_sequence, options, wt_stops, max_mutations, positions, compact = arguments
+    if compact:
+        return _mutant_delta_array(options, wt_stops, max_mutations, positions)
+    return [apply_deltas(aa_sequence, delta)
+            for delta in _iter_mutant_deltas(options, wt_stops, max_mutations, positions)]
+
+
+def _parallel_point_mutants(wt_sequence, max_mutations, workers, compact):
+    """
+    Builds all mutants reachable with up to max_mutations nucleotide mutations on a
+    pool of worker processes
+
+    The space of mutants is split by the position of the first delta. Chunks take
+    every n-th position, so each chunk gets a similar mix of early positions (many
+    partners) and late ones (few partners). Each chunk's mutants are unique and no
+    two chunks share a mutant, so merging is a plain union; MutantSet rows are
+    sorted, so the merged result does not depend on the order chunks finish in
+
+    Arguments:
+    ----------
+        wt_sequence : str
+            DNA nucleotide sequence
+        max_mutations : int
+            maximum number of nucleotide mutations
+        workers : int
+            number of worker processes
+        compact : Bool
+            if True return a MutantSet, otherwise a set of str
+    Returns:
+    --------
+        AA_sequences : set of str, or MutantSet
+    """
+    aa_sequence, options, wt_stops = _codon_options(wt_sequence, max_mutations)
+    n_chunks = workers*4
+    chunks = [range(chunk, len(options), n_chunks) for chunk in range(n_chunks)]
+    arguments = [(aa_sequence, options, wt_stops, max_mutations, chunk, compact) for chunk in chunks]
+
+    import multiprocessing
+    pool = multiprocessing.Pool(workers)
+    try:
+        results = pool.map(_mutant_chunk, arguments, chunksize=1)
+    finally:
+        pool.close()
+        pool.join()
+
+    if compact:
+        return MutantSet(aa_sequence, np.concatenate([_wild_type_row(max_mutations)] + results))
+    AA_sequences = set([aa_sequence])
+    for result in results:
+        AA_sequences.update(result)
     return AA_sequences
 
 
-def two_dna_point_mutants_to_aa(wt_sequence):
+@instrumentation.timed
+def point_mutants_to_aa(wt_sequence, max_mutations, compact=False, workers=None):
     """
-    Finds all potential sequences which can be achieved by making 2 nucleotide
-    mutations and translating to amino acid sequence
+    Finds all potential sequences which can be achieved by making up to
+    max_mutations nucleotide mutations and translating to amino acid sequence
     Ignores mutations that lead to nonsense instead of missense mutations
     Assumes wt_sequence starts on the correct reading frame
-        
-    Makes double mutants via nested loops through each nucleotide in the sequence twice,
-    is therefore VERY SLOW
+
+    Mutations are enumerated codon by codon (see _iter_mutant_deltas()): each codon
+    contributes one option per reachable residue with its minimum number of changes,
+    and branches that overspend max_mutations or would leave a stop codon are pruned,
+    so work scales with the number of unique mutants rather than with the
+    L^max_mutations * 64 nucleotide combinations. The number of mutants still grows
+    fast: use count_point_mutants() to size a library first, and
+    iter_point_mutants_to_aa() to walk one too large to hold, e.g. the triple mutants
+    of a kinase domain
 
     Arguments:
     ----------
         wt_sequence : str
             DNA nucleotide sequence
+        max_mutations : int
+            maximum number of nucleotide mutations, e.g. 1, 2 or 3 (at least 1)
+        Optional:
+        ---------
+            compact : Bool
+                if True, return a MutantSet of deltas against the wild type instead
+                of a set of full sequences
+                default = False
+            workers : int
+                if given, split the work across this many processes; the result is
+                the same as with a single process
+                default = None
     Returns:
     --------
-        AA_sequences : set of str
+        AA_sequences : set of str, or MutantSet
             each str is a unique sequence of one-letter amino acid codes
     """
-    AA_sequences = set()
-    orig_code = genetic_code(11)
-    AA_sequences.add(orig_code.translate(wt_sequence).sequence)
-
-    for k1, char1 in enumerate(wt_sequence[:-1]):
-        for k2, char2 in enumerate(wt_sequence[k1+1:]):
-            for mutant1 in ['A','C','G','U']:
-                if mutant1 == char1:
-                    continue
-                for mutant2 in ['A','C','G','U']:
-                    if k1 == 0:
-                        if k2 < len(wt_sequence):
-                            this_dna_string = ""+mutant1+wt_sequence[k1+1:k2]+mutant2+wt_sequence[k2+1:]
-                        else:
-                            this_dna_string = ""+mutant1+wt_sequence[k1+1:k2]+mutant2
-                    if k1 > 0 and k1 < len(wt_sequence)-1:
-                        if k2 < len(wt_sequence):
-                            this_dna_string = ""+wt_sequence[0:k1]+mutant1+wt_sequence[k1+1:k2]+mutant2+wt_sequence[k2+1:]
-                        else:
-                            this_dna_string = ""+wt_sequence[0:k1]+mutant1+wt_sequence[k1+1:k2]+mutant2
-                    if k1 == len(wt_sequence)-1:
-                        this_dna_string = ""+wt_sequence[0:k1]+mutant1+mutant2
-                    this_sequence = orig_code.translate(this_dna_string).sequence
-                    if '*' in this_sequence[:-1]:
-                        continue
-                    else:
-                        AA_sequences.add(this_sequence)
+    if workers is not None and workers > 1:
+        return _parallel_point_mutants(wt_sequence, max_mutations, workers, compact)
+    if compact:
+        return _compact_point_mutants(wt_sequence, max_mutations)
+    AA_sequences = set(iter_point_mutants_to_aa(wt_sequence, max_mutations))
     return AA_sequences
 
+
+def all_dna_point_mutants_to_aa(wt_sequence, compact=False):
+    """
+    Finds all potential sequences which can be achieved by making a single nucleotide
+    mutation and translating to amino acid sequence
+    Ignores mutations that lead to nonsense instead of missense mutations
+    Assumes wt_sequence starts on the correct reading frame
+    Equivalent to point_mutants_to_aa(wt_sequence, 1, compact)
+        
+    Arguments:
+    ----------
+        wt_sequence : str
+            DNA nucleotide sequence
+        Optional:
+        ---------
+            compact : Bool
+                if True, return a MutantSet of deltas against the wild type instead
+                of a set of full sequences
+                default = False
+    Returns:
+    --------
+        AA_sequences : set of str, or MutantSet
+            each str is a unique sequence of one-letter amino acid codes
+    """
+    return point_mutants_to_aa(wt_sequence, 1, compact=compact)
+
+
+def two_dna_point_mutants_to_aa(wt_sequence, compact=False, workers=None):
+    """
+    Finds all potential sequences which can be achieved by making 2 nucleotide
+    mutations and translating to amino acid sequence
+    Ignores mutations that lead to nonsense instead of missense mutations
+    Assumes wt_sequence starts on the correct reading frame
+
+    Equivalent to point_mutants_to_aa(wt_sequence, 2, compact, workers)
+
+    Arguments:
+    ----------
+        wt_sequence : str
+            DNA nucleotide sequence
+        Optional:
+        ---------
+            compact : Bool
+                if True, return a MutantSet of deltas against the wild type instead
+                of a set of full sequences
+                default = False
+            workers : int
+                if given, split the work across this many processes; the result is
+                the same as with a single process
+                default = None
+    Returns:
+    --------
+        AA_sequences : set of str, or MutantSet
+            each str is a unique sequence of one-letter amino acid codes
+    """
+    return point_mutants_to_aa(wt_sequence, 2, compact=compact, workers=workers)
@@ -0,0 +1,183 @@
+"""
+Identifies which reference protein a translated clone or read comes from, using a
+k-mer index over a library of reference sequences, e.g. aminoacid_sequences/ or a
+reference FASTA
+
+Each k-mer of the query votes for the (reference, diagonal) pairs it occurs at,
+where the diagonal is the offset of the query along the reference. Only the most
+voted diagonals are aligned residue by residue, so the cost of a query depends on
+how many references share its k-mers, not on the size of the library
+
+Alignments are ungapped: identity is the fraction of identical residues where query
+and reference overlap on the chosen diagonal, and coverage is the fraction of the
+reference that overlap spans
+"""
+from collections import namedtuple
+
+# best match of a query against one reference
+#     reference : str, name of the reference
+#     identity : float, identical residues / overlapping residues
+#     coverage : float, overlapping residues / length of the reference
+#     offset : int, position in the reference of the first query residue (negative
+#         if the query starts before the reference)
+#     matches : int, number of identical residues
+#     shared_kmers : int, k-mers voting for this diagonal
+Identification = namedtuple('Identification',
+                            ['reference', 'identity', 'coverage', 'offset', 'matches', 'shared_kmers'])
+
+class ReferenceIndex(object):
+    """
+    Constructor:
+    ------------
+        ReferenceIndex(references, k=5)
+        Arguments:
+        ----------
+            references : list of (str, str) or dict
+                (name, amino acid sequence) of each reference
+            k : int
+                k-mer length (default = 5)
+
+    Attributes:
+    -----------
+        self.k : int
+        self.names : list of str
+        self.sequences : list of str
+            reference amino acid sequences, in the order of self.names
+    Methods:
+    --------
+        from_paths()
+            builds an index over sequence files, directories or glob patterns
+        candidates()
+            diagonals with the most shared k-mers
+        identify()
+            best matching references of a query, with identity and coverage
+    """
+    def __init__(self, references, k=5):
+        """
+        Arguments:
+        ----------
+            references : list of (str, str) or dict
+                (name, amino acid sequence) of each reference
+            k : int
+                k-mer length (default = 5)
+        """
+        if isinstance(references, dict):
+            references = sorted(references.items())
+        self.k = k
+        self.names = [name for name, sequence in references]
+        self.sequences = [sequence.strip().upper() for name, sequence in references]
+        # k-mer -> list of (reference index, position)
+        self._kmers = {}
+        for reference, sequence in enumerate(self.sequences):
+            for position, kmer in _kmers(sequence, k):
+                self._kmers.setdefault(kmer, []).append((reference, position))
+        return
+
+    @classmethod
+    def from_paths(cls, paths, k=5):
+        """
+        Builds an index over every record of sequence files, directories or glob
+        patterns (see batch_translation.expand_paths()); plain sequence files are named
+        after the file, FASTA / FASTQ records after their header
+
+        Arguments:
+        ----------
+            paths : list of str
+            Optional:
+            ---------
+                k : int
+                    k-mer length (default = 5)
+        Returns:
+        --------
+            index : ReferenceIndex
+        """
+        from peanut.batch_translation import expand_paths
+        from peanut.seqio import read_sequences
+        references = []
+        for filename in expand_paths(paths):
+            for record in read_sequences(filename):
+                references.append((record.name, record.sequence))
+        return cls(references, k=k)
+
+    def __len__(self):
+        return len(self.names)
+
+    def candidates(self, query, n_candidates=5):
+        """
+        Finds the (reference, diagonal) pairs sharing the most k-mers with a query
+
+        Arguments:
+        ----------
+            query : str
+                amino acid sequence
+            Optional:
+            ---------
+                n_candidates : int
+                    number of diagonals to return (default = 5)
+        Returns:
+        --------
+            candidates : list of (int, int, int)
+                (reference index, offset, shared k-mers), most shared first
+        """
+        votes = {}
+        for position, kmer in _kmers(query.upper(), self.k):
+            for reference, reference_position in self._kmers.get(kmer, ()):
+                key = (reference, reference_position - position)
+                votes[key] = votes.get(key, 0) + 1
+        ranked = sorted(votes.items(), key=lambda item: (-item[1], item[0]))
+        return [(reference, offset, shared) for (reference, offset), shared in ranked[:n_candidates]]
+
+    def identify(self, query, n_best=1, n_candidates=5):
+        """
+        Finds the references a query matches best
+
+        Candidates are ranked by the number of identical residues on their diagonal,
+        then by identity, so a reference contained exactly in the query beats a close
+        homolog, e.g. human over chicken Src
+
+        Arguments:
+        ----------
+            query : str
+                amino acid sequence, e.g. a translated clone or read
+            Optional:
+            ---------
+                n_best : int
+                    number of references to return (default = 1)
+                n_candidates : int
+                    number of most voted diagonals to align (default = 5)
+        Returns:
+        --------
+            identifications : list of Identification
+                best first, at most one per reference; empty if no k-mer is shared
+        """
+        query = query.strip().upper()
+        best = {}
+        for reference, offset, shared in self.candidates(query, n_candidates):
+            identification = self._align(query, reference, offset, shared)
+            if reference not in best or _rank(identification) < _rank(best[reference]):
+                best[reference] = identification
+        return sorted(best.values(), key=_rank)[:n_best]
+
+    def _align(self, query, reference, offset, shared):
+        """
+        Scores the ungapped alignment of query against a reference, starting at offset
+        """
+        sequence = self.sequences[reference]
+        start = max(0, offset)
+        end = min(len(sequence), offset + len(query))
+        overlap = max(0, end - start)
+        matches = sum(1 for position in range(start, end) if sequence[position] == query[position - offset])
+        return Identification(self.names[reference], float(matches)/overlap if overlap else 0.0,
+                              float(overlap)/len(sequence) if sequence else 0.0, offset, matches, shared)
+
+def _rank(identification):
+    return (-identification.matches, -identification.identity, identification.reference)
+
+def _kmers(sequence, k):
+    """
+    Yields (position, k-mer) for every k-mer without an unknown residue 'X'
+    """
+    for position in range(len(sequence) - k + 1):
+        kmer = sequence[position:position+k]
+        if 'X' not in kmer:
+            yield position, kmer
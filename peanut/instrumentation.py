@@ -0,0 +1,215 @@
+"""
+Opt-in instrumentation: stage timings, iteration counts and warnings from the hot
+paths of peanut, delivered as structured events to registered callbacks instead of
+being printed in the middle of a computation
+
+Nothing is recorded until a callback is registered; until then each instrumented
+point costs a check of the module-level flag `active`
+
+    from peanut import instrumentation
+    with instrumentation.Collector() as collector:
+        generator.saturation_library()
+    print(collector.summary())
+
+Event kinds:
+    'timing' : value is the seconds spent in the named stage
+    'count' : value is a number of iterations or items, e.g. primer window steps
+    'warning' : value is a message, e.g. no primer with an acceptable melting temp
+    'info' : value is a message or None, details in the fields
+"""
+from collections import namedtuple
+import functools
+import time
+
+# one instrumentation event
+#     kind : str, 'timing', 'count', 'warning' or 'info'
+#     name : str, e.g. 'two_dna_point_mutants_to_aa' or 'primer_window_steps'
+#     value : float, int or str, depending on kind
+#     fields : dict, any further details, e.g. the mutation a warning is about
+Event = namedtuple('Event', ['kind', 'name', 'value', 'fields'])
+
+# True while at least one callback is registered
+active = False
+_callbacks = []
+
+def add_callback(callback):
+    """
+    Registers a function to be called with every Event
+    """
+    global active
+    _callbacks.append(callback)
+    active = True
+
+def remove_callback(callback):
+    """
+    Unregisters a function added with add_callback()
+    """
+    global active
+    _callbacks.remove(callback)
+    active = bool(_callbacks)
+
+def emit(kind, name, value=None, **fields):
+    """
+    Sends an Event to every registered callback; does nothing if there are none
+    """
+    if not active:
+        return
+    event = Event(kind, name, value, fields)
+    for callback in list(_callbacks):
+        callback(event)
+
+def count(name, n=1, **fields):
+    """
+    Records n iterations or items of the named kind
+    """
+    emit('count', name, n, **fields)
+
+def warn(name, message, **fields):
+    """
+    Records a warning
+    """
+    emit('warning', name, message, **fields)
+
+class _NullTimer(object):
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+_null_timer = _NullTimer()
+
+class _Timer(object):
+    def __init__(self, name, fields):
+        self.name = name
+        self.fields = fields
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        emit('timing', self.name, time.perf_counter() - self.start, **self.fields)
+        return False
+
+def timer(name, **fields):
+    """
+    Context manager recording the time spent in its block as a 'timing' event
+    """
+    if not active:
+        return _null_timer
+    return _Timer(name, fields)
+
+def timed(function):
+    """
+    Decorator recording the time spent in each call of function as a 'timing' event
+    named after the function
+    """
+    @functools.wraps(function)
+    def wrapper(*args, **kwargs):
+        if not active:
+            return function(*args, **kwargs)
+        with _Timer(function.__name__, {}):
+            return function(*args, **kwargs)
+    return wrapper
+
+class Collector(object):
+    """
+    Constructor:
+    ------------
+        Collector()
+
+    Keeps every event while registered, either through add_callback(collector) or
+    as a context manager
+
+    Attributes:
+    -----------
+        self.events : list of Event
+    Methods:
+    --------
+        timings()
+            calls and total seconds per stage
+        counts()
+            total count per name
+        warnings()
+            warning events
+        summary()
+            a printable table of all of the above
+    """
+    def __init__(self):
+        self.events = []
+        return
+
+    def __call__(self, event):
+        self.events.append(event)
+
+    def __enter__(self):
+        add_callback(self)
+        return self
+
+    def __exit__(self, *exc_info):
+        remove_callback(self)
+        return False
+
+    def timings(self):
+        """
+        Returns:
+        --------
+            timings : dict
+                stage name -> (number of calls, total seconds)
+        """
+        timings = {}
+        for event in self.events:
+            if event.kind == 'timing':
+                calls, total = timings.get(event.name, (0, 0.0))
+                timings[event.name] = (calls+1, total+event.value)
+        return timings
+
+    def counts(self):
+        """
+        Returns:
+        --------
+            counts : dict
+                name -> total count
+        """
+        counts = {}
+        for event in self.events:
+            if event.kind == 'count':
+                counts[event.name] = counts.get(event.name, 0) + event.value
+        return counts
+
+    def warnings(self):
+        """
+        Returns:
+        --------
+            warnings : list of Event
+        """
+        return [event for event in self.events if event.kind == 'warning']
+
+    def summary(self):
+        """
+        Returns:
+        --------
+            summary : str
+                stage timings, counts and warnings grouped by name
+        """
+        lines = ["%-36s %8s %12s %12s" % ("stage", "calls", "total (s)", "mean (s)")]
+        for name, (calls, total) in sorted(self.timings().items(), key=lambda item: -item[1][1]):
+            lines.append("%-36s %8d %12.4f %12.6f" % (name, calls, total, total/calls))
+        counts = self.counts()
+        if counts:
+            lines.append("")
+            lines.append("%-36s %8s" % ("count", "total"))
+            for name in sorted(counts):
+                lines.append("%-36s %8d" % (name, counts[name]))
+        warnings = {}
+        for event in self.warnings():
+            warnings.setdefault(event.name, []).append(event)
+        if warnings:
+            lines.append("")
+            lines.append("%-36s %8s   %s" % ("warning", "times", "first"))
+            for name in sorted(warnings):
+                first = warnings[name][0]
+                details = " ".join("%s=%s" % item for item in sorted(first.fields.items()))
+                lines.append("%-36s %8d   %s %s" % (name, len(warnings[name]), first.value, details))
+        return "\n".join(lines)
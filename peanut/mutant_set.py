@@ -0,0 +1,288 @@
+"""
+Defines class MutantSet, a compact container for a set of amino acid mutants of a
+single wild type protein. Each mutant is stored as a row of (position, residue)
+deltas against the wild type in a NumPy structured array, and full sequences are
+only built when asked for.
+
+Dependencies:
+    Requires NumPy
+"""
+import numpy as np
+
+# packed (position, residue) pair: 5 bytes per delta
+# positions are big-endian so that sorting rows bytewise also sorts them by position
+DELTA_DTYPE = np.dtype([('position', '>u4'), ('residue', 'S1')])
+# position of an unused delta slot; sorts after every real position
+NO_POSITION = 0xFFFFFFFF
+
+class MutantSet(object):
+    """
+    Constructor:
+    ------------
+        MutantSet(aa_sequence, deltas, canonical=False)
+        Arguments:
+        ----------
+            aa_sequence : str
+                wild type sequence of one-letter amino acid codes
+            deltas : numpy.ndarray of DELTA_DTYPE, shape (n_mutants, max_deltas)
+                one row per mutant, holding its (position, new residue) pairs sorted by
+                position; unused slots have position NO_POSITION
+            canonical : Bool
+                if True, rows are already sorted and unique (default = False)
+
+    Attributes:
+    -----------
+        self.aa_sequence : str
+            wild type sequence of one-letter amino acid codes
+        self.deltas : numpy.ndarray of DELTA_DTYPE, shape (n_mutants, max_deltas)
+            sorted, unique rows of deltas; the wild type is the row with no deltas
+    Methods:
+    --------
+        from_deltas()
+            builds a MutantSet from an iterable of delta tuples
+        sequence()
+            builds the amino acid sequence of a single mutant
+        mutant_deltas()
+            returns the deltas of a single mutant as a tuple of (int, str)
+        iter_deltas()
+            iterates over the deltas of all mutants
+        union(), intersection(), difference()
+            set operations against another MutantSet of the same wild type
+            also available as |, & and -
+        to_set()
+            builds every sequence and returns them as a set of str
+    """
+    def __init__(self, aa_sequence, deltas, canonical=False):
+        """
+        Arguments:
+        ----------
+            aa_sequence : str
+                wild type sequence of one-letter amino acid codes
+            deltas : numpy.ndarray of DELTA_DTYPE, shape (n_mutants, max_deltas)
+                one row per mutant, holding its (position, new residue) pairs sorted by
+                position; unused slots have position NO_POSITION
+            canonical : Bool
+                if True, rows are already sorted and unique (default = False)
+        """
+        deltas = np.ascontiguousarray(deltas, dtype=DELTA_DTYPE)
+        if deltas.ndim != 2:
+            raise ValueError("deltas must be a 2-D array of shape (n_mutants, max_deltas)")
+        self.aa_sequence = aa_sequence
+        self.deltas = deltas
+        if not canonical:
+            self.deltas = _rows(np.unique(self._keys()), deltas.shape[1])
+        return
+
+    @classmethod
+    def from_deltas(cls, aa_sequence, deltas, max_deltas=None):
+        """
+        Builds a MutantSet from delta tuples, such as those returned by
+        convert_dna_to_aa.two_dna_point_mutant_deltas()
+
+        Arguments:
+        ----------
+            aa_sequence : str
+                wild type sequence of one-letter amino acid codes
+            deltas : iterable of tuple
+                each tuple holds the (position, new residue) pairs of one mutant
+            Optional:
+            ---------
+                max_deltas : int
+                    number of delta slots per mutant; defaults to the longest tuple
+        Returns:
+        --------
+            mutant_set : MutantSet
+        """
+        deltas = [tuple(sorted(delta)) for delta in deltas]
+        if max_deltas is None:
+            max_deltas = max([len(delta) for delta in deltas] + [1])
+        array = np.empty((len(deltas), max_deltas), dtype=DELTA_DTYPE)
+        array['position'] = NO_POSITION
+        array['residue'] = b''
+        for row, delta in enumerate(deltas):
+            for column, (position, residue) in enumerate(delta):
+                array[row, column] = (position, residue)
+        return cls(aa_sequence, array)
+
+    def _keys(self):
+        """
+        Views each row of deltas as a single opaque value, so whole mutants can be
+        sorted, compared and searched by NumPy
+
+        Returns:
+        --------
+            keys : numpy.ndarray of void, shape (n_mutants,)
+        """
+        width = self.deltas.shape[1]
+        return self.deltas.view(np.dtype((np.void, DELTA_DTYPE.itemsize*width))).ravel()
+
+    def _widen(self, width):
+        """
+        Returns the deltas padded with unused slots up to the given width
+        """
+        if width == self.deltas.shape[1]:
+            return self
+        deltas = np.empty((len(self), width), dtype=DELTA_DTYPE)
+        deltas['position'] = NO_POSITION
+        deltas['residue'] = b''
+        deltas[:, :self.deltas.shape[1]] = self.deltas
+        return MutantSet(self.aa_sequence, deltas, canonical=True)
+
+    def _aligned_keys(self, other):
+        if not isinstance(other, MutantSet):
+            raise TypeError("set operations need another MutantSet")
+        if other.aa_sequence != self.aa_sequence:
+            raise ValueError("MutantSets have different wild type sequences")
+        width = max(self.deltas.shape[1], other.deltas.shape[1])
+        return width, self._widen(width)._keys(), other._widen(width)._keys()
+
+    def __len__(self):
+        return len(self.deltas)
+
+    def __iter__(self):
+        for row in range(len(self)):
+            yield self.sequence(row)
+
+    def __getitem__(self, row):
+        return self.sequence(row)
+
+    def __contains__(self, mutant):
+        """
+        Arguments:
+        ----------
+            mutant : str or tuple
+                an amino acid sequence, or a tuple of (position, new residue) pairs
+        """
+        if isinstance(mutant, str):
+            if len(mutant) != len(self.aa_sequence):
+                return False
+            wt = np.frombuffer(self.aa_sequence.encode('ascii'), dtype='S1')
+            mut = np.frombuffer(mutant.encode('ascii'), dtype='S1')
+            positions = np.flatnonzero(wt != mut)
+            mutant = [(position, mutant[position]) for position in positions]
+        mutant = sorted(mutant)
+        width = self.deltas.shape[1]
+        if len(mutant) > width:
+            return False
+        row = np.empty((1, width), dtype=DELTA_DTYPE)
+        row['position'] = NO_POSITION
+        row['residue'] = b''
+        for column, (position, residue) in enumerate(mutant):
+            row[0, column] = (position, residue)
+        key = row.view(np.dtype((np.void, DELTA_DTYPE.itemsize*width))).ravel()
+        keys = self._keys()
+        index = np.searchsorted(keys, key)[0]
+        return index < len(keys) and keys[index] == key[0]
+
+    def __eq__(self, other):
+        if not isinstance(other, MutantSet):
+            return NotImplemented
+        if other.aa_sequence != self.aa_sequence or len(other) != len(self):
+            return False
+        width, keys, other_keys = self._aligned_keys(other)
+        return bool(np.all(keys == other_keys))
+
+    def __ne__(self, other):
+        equal = self.__eq__(other)
+        if equal is NotImplemented:
+            return equal
+        return not equal
+
+    def __or__(self, other):
+        return self.union(other)
+
+    def __and__(self, other):
+        return self.intersection(other)
+
+    def __sub__(self, other):
+        return self.difference(other)
+
+    def __repr__(self):
+        return "MutantSet(%d mutants of a %d residue wild type)" % (len(self), len(self.aa_sequence))
+
+    @property
+    def nbytes(self):
+        """
+        Number of bytes used to store the deltas
+        """
+        return self.deltas.nbytes
+
+    def mutant_deltas(self, row):
+        """
+        Returns the deltas of a single mutant
+
+        Arguments:
+        ----------
+            row : int
+                index of the mutant
+        Returns:
+        --------
+            deltas : tuple of (int, str)
+                (position, new residue) pairs, sorted by position
+        """
+        return tuple((int(position), residue.decode('ascii'))
+                     for position, residue in self.deltas[row] if position != NO_POSITION)
+
+    def iter_deltas(self):
+        """
+        Iterates over the deltas of all mutants, in the order of the set
+        """
+        for row in range(len(self)):
+            yield self.mutant_deltas(row)
+
+    def sequence(self, row):
+        """
+        Builds the amino acid sequence of a single mutant
+
+        Arguments:
+        ----------
+            row : int
+                index of the mutant
+        Returns:
+        --------
+            mutant_sequence : str
+                sequence of one-letter amino acid codes
+        """
+        mutant = bytearray(self.aa_sequence.encode('ascii'))
+        for position, residue in self.deltas[row]:
+            if position != NO_POSITION:
+                mutant[position] = residue[0]
+        return mutant.decode('ascii')
+
+    def union(self, other):
+        """
+        Returns a MutantSet of the mutants found in either set
+        """
+        width, keys, other_keys = self._aligned_keys(other)
+        return MutantSet(self.aa_sequence, _rows(np.union1d(keys, other_keys), width), canonical=True)
+
+    def intersection(self, other):
+        """
+        Returns a MutantSet of the mutants found in both sets
+        """
+        width, keys, other_keys = self._aligned_keys(other)
+        return MutantSet(self.aa_sequence, _rows(np.intersect1d(keys, other_keys), width), canonical=True)
+
+    def difference(self, other):
+        """
+        Returns a MutantSet of the mutants found in this set but not the other
+        """
+        width, keys, other_keys = self._aligned_keys(other)
+        return MutantSet(self.aa_sequence, _rows(np.setdiff1d(keys, other_keys), width), canonical=True)
+
+    def to_set(self):
+        """
+        Builds every mutant sequence
+
+        Returns:
+        --------
+            aa_sequences : set of str
+                each str is a unique sequence of one-letter amino acid codes
+        """
+        return set(self)
+
+def _rows(keys, width):
+    """
+    Turns a 1-D array of row keys back into a 2-D array of deltas
+    """
+    return np.ascontiguousarray(keys).view(DELTA_DTYPE).reshape(-1, width)
@@ -4,12 +4,148 @@ forth to amino acid sequences, with methods to generate forward and reverse prim
 for desired point mutations to the wild type.
 
 Dependencies:
-    Requires scikit-bio
-        https://github.com/biocore/scikit-bio
+    Requires NumPy
 """
 
-from skbio.sequence import genetic_code
-from skbio.sequence import DNASequence
+from collections import namedtuple
+
+import numpy as np
+
+from peanut import instrumentation
+from peanut.codon_table import CODONS, CODON_DISTANCES, SYNONYMS, UNKNOWN_CODON
+from peanut.codon_table import codon_index, reverse_complement, translate
+
+# forward and reverse primers designed for one point mutation
+#     mutation : str, e.g. 'T315I'
+#     forward_primer, reverse_primer : str, lowercase nucleotide sequences
+#     length : int, number of nucleotides in each primer
+#     melting_temp : float, melting temperature of the primer in C
+#     gc_percent : float, GC content of the primer in %
+#     wt_codon, mut_codon : str, wild type and mutant codons
+#     n_changes : int, number of nucleotides changed in the codon
+#     good_melting_temp : Bool, False if no acceptable primer was found up to 45 nucleotides
+PrimerDesign = namedtuple('PrimerDesign',
+                          ['mutation', 'forward_primer', 'reverse_primer', 'length', 'melting_temp',
+                           'gc_percent', 'wt_codon', 'mut_codon', 'n_changes', 'good_melting_temp'])
+
+# constraints on the primer windows considered by PrimerGenerator.place_primers()
+#     min_length, max_length : int, number of nucleotides in the primer
+#     min_melting_temp : float, lowest acceptable melting temp in C
+#     max_melting_temp : float, highest acceptable melting temp in C, or None
+#     min_gc_percent, max_gc_percent : float, acceptable range of GC content in %
+#     gc_clamp : Bool, if True the primer has to start and end on g or c, unless it
+#         starts or ends with the sequence
+#     min_flank : int, nucleotides of template needed on each side of the mutant
+#         codon, or as many as the sequence has
+PrimerConstraints = namedtuple('PrimerConstraints',
+                               ['min_length', 'max_length', 'min_melting_temp', 'max_melting_temp',
+                                'min_gc_percent', 'max_gc_percent', 'gc_clamp', 'min_flank'])
+# defaults are the criteria of make_single_mutant()
+PrimerConstraints.__new__.__defaults__ = (25, 45, 78.0, None, 0.0, 100.0, True, 11)
+
+# mutants whose windows are scored in one array by place_primers(), bounding its memory
+_PLACEMENT_BATCH = 256
+
+# the 20 standard amino acids
+AMINO_ACIDS = 'ACDEFGHIKLMNPQRSTVWY'
+
+# codons of each residue in T, C, A, G order, the order ties between equally good
+# codons have always been broken in
+_SYNONYMS = dict((residue, sorted(codons, key=lambda codon: ['TCAG'.index(base) for base in codon]))
+                 for residue, codons in SYNONYMS.items())
+
+def codon_distance(codon1, codon2):
+    """
+    Number of differing nucleotides between two codons
+
+    Arguments:
+    ----------
+        codon1, codon2 : str
+            len = 3, uppercase
+    Returns:
+    --------
+        distance : int
+    """
+    index1 = codon_index(codon1)
+    index2 = codon_index(codon2)
+    if index1 == UNKNOWN_CODON or index2 == UNKNOWN_CODON:
+        return sum(1 for base1, base2 in zip(codon1, codon2) if base1 != base2)
+    return int(CODON_DISTANCES[index1, index2])
+
+def _choose_codon(wt_codon, mut_res):
+    """
+    Picks the codon for mut_res closest to wt_codon: the last single change codon in
+    _SYNONYMS order, or otherwise the first codon needing the fewest changes
+    """
+    mut_codons = _SYNONYMS[mut_res]
+    distances = [codon_distance(wt_codon, codon) for codon in mut_codons]
+    if 1 in distances:
+        k = len(distances) - 1 - distances[::-1].index(1)
+    else:
+        k = distances.index(min(distances))
+    return mut_codons[k], distances[k]
+
+# (wild type codon, mutant residue) -> (mutant codon, number of changed nucleotides)
+# for every codon of A, C, G and T; other codons are added on first use
+BEST_CODONS = dict(((wt_codon, mut_res), _choose_codon(wt_codon, mut_res))
+                   for wt_codon in CODONS for mut_res in _SYNONYMS)
+
+def best_codon(wt_codon, mut_res):
+    """
+    Looks up the codon used to mutate a wild type codon to a residue
+
+    Arguments:
+    ----------
+        wt_codon : str
+            len(wt_codon) = 3, uppercase
+        mut_res : char
+            single letter amino acid code of mutant residue
+    Returns:
+    --------
+        mut_codon : str
+            the last codon of mut_res one nucleotide change away from wt_codon, or if
+            there is none, the first codon needing the fewest changes
+        n_changes : int
+            number of nucleotides changed
+    """
+    key = (wt_codon, mut_res)
+    if key not in BEST_CODONS:
+        BEST_CODONS[key] = _choose_codon(wt_codon, mut_res)
+    return BEST_CODONS[key]
+
+def parse_mutation(mutant):
+    """
+    Splits a point mutation written as e.g. 'T315I'
+
+    Arguments:
+    ----------
+        mutant : str
+            wild type residue, residue id number and mutant residue
+    Returns:
+    --------
+        wt_res : char
+            single letter amino acid code of wildtype residue
+        res_num : int
+            residue id number
+        mut_res : char
+            single letter amino acid code of mutant residue
+    """
+    return mutant[0], int(mutant[1:-1]), mutant[-1]
+
+def write_primer_table(designs, filename):
+    """
+    Writes primer designs to a single tab-separated table, one design per line
+
+    Arguments:
+    ----------
+        designs : list of PrimerDesign
+        filename : str
+            file to write
+    """
+    with open(filename, 'w') as fo:
+        fo.write("\t".join(PrimerDesign._fields)+"\n")
+        for design in designs:
+            fo.write("\t".join(str(value) for value in design)+"\n")
 
 class PrimerGenerator(object):
     """
@@ -33,10 +169,21 @@ class PrimerGenerator(object):
             from input nucleotide sequence
         self.first_res : int
             index of the first residue in the input sequence
-        self.orig_code : skbio.sequence.genetic_code
-            arbitrary code object used by sci-kit bio as translator
+        self._gc_prefix : list of int
+            running count of G and C nucleotides along self.sequence, used to get the
+            GC content of any primer window in constant time
     Methods:
     --------
+        make_mutants()
+            Designs primers for a list of point mutations in one call, returning a
+            PrimerDesign for each
+        saturation_library()
+            Designs primers for every residue mutated to each of the 19 other amino acids,
+            optionally writing them all to one table
+        place_primers()
+            Chooses the best primer window around many mutant codons at once, scoring
+            every window against configurable PrimerConstraints; used by make_mutants()
+            and saturation_library() when given constraints
         make_single_mutant()
             Determines how many nucleotide changes are required for the desired amino acid
             mutation, then constructs a primer with a minimum of 25 nucleotides, increasing 
@@ -45,11 +192,14 @@ class PrimerGenerator(object):
             melting temperature (78C minimum)
             Calls sub-methods:
             ------------------
+                _find_primer_window()
+                    Grows the primer window around the mutant codon, using prefix sums of
+                    GC content so that each extension is O(1)
                 _check_melting_temp()
-                    Calculates melting temp of a given primer sequence, suggests new start and
+                    Calculates melting temp of a given primer window, suggests new start and
                     end indices for primer if melting temp and / or GC content is too low
-                _make_mutant()
-                    Finds the mutant codon, if mutation requires more than 1 nucleotide change
+                best_codon()
+                    Looks up the mutant codon needing the fewest nucleotide changes
 
     """
     def __init__(self, sequence, first_res=1):
@@ -61,27 +211,36 @@ class PrimerGenerator(object):
             first_res : int
                 residue id number of first residue in sequence (default = 1)
         """
-        orig_code = genetic_code(11)
         sequence = sequence.upper()
-        aa_sequence = orig_code.translate(sequence).sequence
+        aa_sequence = translate(sequence)
     
         self.sequence = sequence
         self.aa_sequence = aa_sequence
         self.first_res = first_res
-        self.orig_code = orig_code
+        # self._gc_prefix[k] = number of G and C in sequence[:k]
+        self._gc_prefix = [0]
+        for char in sequence:
+            self._gc_prefix.append(self._gc_prefix[-1] + (char in 'GC'))
         return
 
-    def _check_melting_temp(self, primer_sequence, start_ix, end_ix, length_sequence):
+    def _check_melting_temp(self, gc_count, primer_length, first_base, last_base, start_ix, end_ix, length_sequence,
+                            verbose=True):
         """
-        Calculates melting temp of a given primer sequence, suggests new start and
+        Calculates melting temp of a primer from its GC count, suggests new start and
         end indices for primer if melting temp and / or GC content is too low
 
-        Called iteratively by make_single_mutant()
+        Called iteratively by _find_primer_window()
 
         Arguments:
         ----------
-            primer_sequence : str
-                nucleotide sequence including mutant codon to be checked
+            gc_count : int
+                number of g and c nucleotides in the primer, including the mutant codon
+            primer_length : int
+                number of nucleotides in the primer
+            first_base : char
+                lowercase first nucleotide of the primer
+            last_base : char
+                lowercase final nucleotide of the primer
             start_ix : int
                 index of the first nucleotide in the primer sequence in the full
                 nucleotide sequence
@@ -90,6 +249,9 @@ class PrimerGenerator(object):
                 nucleotide sequence
             length_sequence : int
                 length of the full nucleotide sequence
+            verbose : Bool
+                if verbose==True, print melting temp of an accepted primer; a GC content
+                below 40% is also recorded as an instrumentation warning
         
         Returns:
         --------
@@ -99,32 +261,107 @@ class PrimerGenerator(object):
                 proposed index for first nucleotide in primer sequence
             end_ix : int
                 proposed index for final nucleotide in primer sequence
+            gc_percent : float
+                GC content of the checked primer in %
+            melting_temp : float
+                melting temp of the checked primer in C
         """
-        N = len(primer_sequence)
-        gc_percent = float(primer_sequence.count('g') + primer_sequence.count('c')) / N * 100.0
-        mismatch_percent = 1.000 / N * 100.0
-        melting_temp = 81.5 + 0.41*gc_percent - 675.0/N - mismatch_percent
+        gc_percent, melting_temp = _melting_temp(gc_count, primer_length)
         if melting_temp < 78.0 or end_ix - start_ix < 25:
             if start_ix > 0:
                 start_ix +=-1
             if end_ix <length_sequence-1:
                 end_ix +=1
-            return False, start_ix, end_ix
+            return False, start_ix, end_ix, gc_percent, melting_temp
         else:
             # should be actively dealing with this; for now just giving notification
-            if primer_sequence[0] not in ['g','c'] and start_ix != 0:
+            if first_base not in ['g','c'] and start_ix != 0:
                 start_ix +=-1
-                return False, start_ix, end_ix
-            if primer_sequence[-1] not in ['g','c'] and end_ix != length_sequence-1:
+                return False, start_ix, end_ix, gc_percent, melting_temp
+            if last_base not in ['g','c'] and end_ix != length_sequence-1:
                 end_ix +=1
-                return False, start_ix, end_ix
-            if gc_percent < 40.0:
-                print("GC out of range!")
-                print(str(gc_percent)+"% GC")
-            print("Melting temp: "+str(melting_temp)+"C\n")
-            return True, start_ix, end_ix
+                return False, start_ix, end_ix, gc_percent, melting_temp
+            if gc_percent < 40.0 and instrumentation.active:
+                instrumentation.warn('gc_out_of_range', "GC out of range!", gc_percent=gc_percent,
+                                     start_ix=start_ix, end_ix=end_ix)
+            if verbose:
+                if gc_percent < 40.0:
+                    print("GC out of range!")
+                    print(str(gc_percent)+"% GC")
+                print("Melting temp: "+str(melting_temp)+"C\n")
+            return True, start_ix, end_ix, gc_percent, melting_temp
+
+    def _find_primer_window(self, codon_start, mut_codon, verbose=True):
+        """
+        Grows the primer window around the mutant codon until melting temp, length and
+        GC clamp are acceptable, or the primer would be longer than 45 nucleotides
+
+        GC content of each window comes from prefix sums over the wild type, corrected
+        for the mutant codon, so each extension is O(1) and no primer string is built
+        until the window is chosen
+
+        Arguments:
+        ----------
+            codon_start : int
+                index of the first nucleotide of the mutated codon
+            mut_codon : str
+                mutant codon
+            verbose : Bool
+                if verbose==True, print melting temp, or a warning if none was found
+                (the number of extension steps and the warning are also recorded when
+                instrumentation is active)
+        Returns:
+        --------
+            start_ix : int
+                index of the first nucleotide of the chosen primer
+            end_ix : int
+                index after the final nucleotide of the chosen primer
+            good_melting_temp : Bool
+                False if no acceptable primer was found
+            gc_percent : float
+                GC content of the chosen primer in %
+            melting_temp : float
+                melting temp of the chosen primer in C
+        """
+        sequence = self.sequence
+        gc_prefix = self._gc_prefix
+        length_sequence = len(sequence)
+        codon_end = codon_start+3
+        mut_codon = mut_codon.lower()
+        codon_gc = mut_codon.count('g') + mut_codon.count('c') - (gc_prefix[codon_end] - gc_prefix[codon_start])
+
+        good_melting_temp = False
+        start_ix = max(0,codon_start-11)
+        end_ix = min(length_sequence,codon_end+11)
+        steps = 0
 
-    def make_single_mutant(self, wt_res,res_num,mut_res):
+        while not good_melting_temp:
+            if end_ix - start_ix > 45:
+                if verbose:
+                    print("Acceptable melting temp was not found")
+                break
+            steps += 1
+            primer_start, primer_end = start_ix, end_ix
+            # end_ix may step past the end of the sequence; the primer stops there
+            last_ix = min(end_ix, length_sequence)
+            gc_count = gc_prefix[last_ix] - gc_prefix[start_ix] + codon_gc
+            first_base = mut_codon[0] if start_ix == codon_start else sequence[start_ix].lower()
+            last_base = mut_codon[-1] if last_ix == codon_end else sequence[last_ix-1].lower()
+            good_melting_temp, start_ix, end_ix, gc_percent, melting_temp = self._check_melting_temp(
+                gc_count, last_ix - start_ix, first_base, last_base, start_ix, end_ix, length_sequence, verbose)
+            if not good_melting_temp and (start_ix, end_ix) == (primer_start, primer_end):
+                # window already spans the whole sequence
+                if verbose:
+                    print("Acceptable melting temp was not found")
+                break
+        if instrumentation.active:
+            instrumentation.count('primer_window_steps', steps)
+            if not good_melting_temp:
+                instrumentation.warn('melting_temp_not_found', "Acceptable melting temp was not found",
+                                     codon_start=codon_start, melting_temp=melting_temp)
+        return primer_start, primer_end, good_melting_temp, gc_percent, melting_temp
+
+    def make_single_mutant(self, wt_res,res_num,mut_res, verbose=True):
         """
         Determines how many nucleotide changes are required for the desired amino acid
         mutation, then constructs a primer with a minimum of 25 nucleotides, increasing 
@@ -138,7 +375,8 @@ class PrimerGenerator(object):
         DNA sequence should be only the kinase domain
 
         Desired mutation should require only a single nucleotide change; will print warning
-        if more nucleotide changes are required
+        if more nucleotide changes are required, unless verbose=False; the warnings are
+        also recorded as events for an instrumentation.Collector either way
 
         Arguments:
         ----------
@@ -150,6 +388,10 @@ class PrimerGenerator(object):
                 residue id number of residue to be mutated
             mut_res : char
                 single letter amino acid code of mutant residue
+            Optional:
+            ---------
+                verbose : Bool
+                    if verbose==True, print melting temps and warnings (default = True)
         Returns:
         --------
             forward_primer : str
@@ -157,71 +399,290 @@ class PrimerGenerator(object):
             reverse_primer : str
                 nucleotide sequence
         """
-        aa_sequence = self.aa_sequence
-        sequence = self.sequence
-        first_res = self.first_res
-        orig_code = self.orig_code
+        design = self._design_primers(wt_res, res_num, mut_res, verbose=verbose)
+        return design.forward_primer, design.reverse_primer
 
-        if not str(wt_res) == aa_sequence[res_num-first_res]:
-            raise IOError("Desired residue not found -- check wildtype residue name and id, and first residue id")
-        # start of codon of residue of interest is at (res_num - first_res)*3
+    def make_mutants(self, mutants, verbose=True, constraints=None):
+        """
+        Designs forward and reverse primers for each of a list of point mutations, with
+        the same codon choice and primer window search as make_single_mutant()
+
+        The wild type translation and nucleotide sequence are shared by all designs, so
+        a whole panel of mutants costs one PrimerGenerator
+
+        Arguments:
+        ----------
+            mutants : list of str
+                point mutations written as wild type residue, residue id number and
+                mutant residue, e.g. ["T315I", "E255K"]
+            verbose : Bool
+                if verbose==True, print melting temps and warnings as make_single_mutant()
+                does (default = True); with verbose=False, warnings are still available
+                to an instrumentation.Collector and melting temps are in each design
+            constraints : PrimerConstraints
+                if given, choose each primer from every window around its codon with
+                place_primers() instead of growing one window (default = None)
+        Returns:
+        --------
+            designs : list of PrimerDesign
+                one per mutant, in the same order
+        """
+        with instrumentation.timer('make_mutants'):
+            if constraints is not None:
+                return self._place_designs([parse_mutation(mutant) for mutant in mutants], constraints, verbose)
+            return [self._design_primers(*parse_mutation(mutant), verbose=verbose) for mutant in mutants]
+
+    @instrumentation.timed
+    def saturation_library(self, filename=None, verbose=False, constraints=None):
+        """
+        Designs forward and reverse primers for every residue of the construct mutated
+        to each of the 19 other amino acids, with the same codon choice and primer
+        window search as make_single_mutant()
 
-        wt_codon = DNASequence(sequence[(res_num - first_res)*3:(res_num - first_res)*3+3])
+        All designs share the wild type translation and the GC prefix sums of the
+        construct, so a kinase domain takes seconds
 
-        mut_codons = orig_code.synonyms[mut_res]
-        mut_codon = None
-        for codon in mut_codons:
-            if wt_codon.distance(DNASequence(codon))*3 == 1:
-                mut_codon = codon
+        Arguments:
+        ----------
+            Optional:
+            ---------
+                filename : str
+                    if given, write all designs to this file as one tab-separated table
+                    (see write_primer_table())
+                verbose : Bool
+                    if verbose==True, print melting temps and warnings for every design
+                    (default = False)
+                constraints : PrimerConstraints
+                    if given, choose each primer from every window around its codon
+                    with place_primers(), all residues at once (default = None)
+        Returns:
+        --------
+            designs : list of PrimerDesign
+                ordered by residue, then by mutant residue
+        """
+        mutations = [(wt_res, k+self.first_res, mut_res) for k, wt_res in enumerate(self.aa_sequence)
+                     if wt_res in AMINO_ACIDS for mut_res in AMINO_ACIDS if mut_res != wt_res]
+        if constraints is not None:
+            designs = self._place_designs(mutations, constraints, verbose)
+        else:
+            designs = [self._design_primers(wt_res, res_num, mut_res, verbose=verbose)
+                       for wt_res, res_num, mut_res in mutations]
+        if filename is not None:
+            write_primer_table(designs, filename)
+        return designs
 
-        if not mut_codon:
+    def _mutant_codon(self, wt_res, res_num, mut_res, verbose=True):
+        """
+        Checks the wild type residue and looks up the wild type and mutant codons, and
+        the number of nucleotides changed, warning if that is more than one
+        """
+        if not str(wt_res) == self.aa_sequence[res_num-self.first_res]:
+            raise IOError("Desired residue not found -- check wildtype residue name and id, and first residue id")
+        # start of codon of residue of interest is at (res_num - first_res)*3
+        codon_start = (res_num - self.first_res)*3
+        wt_codon = self.sequence[codon_start:codon_start+3]
+
+        mut_codon, n_changes = best_codon(wt_codon, mut_res)
+        if instrumentation.active:
+            instrumentation.count('primers_designed')
+            if n_changes != 1:
+                instrumentation.warn('multiple_base_changes', "Cannot make desired mutant with a single base change",
+                                     mutation=str(wt_res)+str(res_num)+str(mut_res), n_changes=n_changes)
+        if n_changes != 1 and verbose:
             print("Cannot make desired mutant with a single base change")
-            mut_codon = self._make_mutant(wt_codon, mut_codons)
+            print("This mutant required "+str(n_changes)+"bp modifications\n")
+        return wt_codon, mut_codon, n_changes
 
-        good_melting_temp = False
-        start_ix = max(0,(res_num-first_res)*3-11)
-        end_ix = min(len(sequence),(res_num+1-first_res)*3+11)
+    def _design_primers(self, wt_res, res_num, mut_res, verbose=True):
+        """
+        Does the work of make_single_mutant(), returning the full PrimerDesign
+        """
+        sequence = self.sequence
+        first_res = self.first_res
 
-        while not good_melting_temp:
-            if end_ix - start_ix > 45:
-                print("Acceptable melting temp was not found")
-                break
-            forward_primer = sequence[start_ix:(res_num - first_res)*3]+mut_codon+sequence[(res_num+1 - first_res)*3:end_ix]
-            forward_primer = forward_primer.lower()
-            good_melting_temp, start_ix, end_ix = self._check_melting_temp(forward_primer, start_ix, end_ix, len(sequence))
-    
-        forward_sequence = DNASequence(forward_primer)
-        reverse_sequence = forward_sequence.rc()
-    
-        reverse_primer = reverse_sequence.sequence
+        wt_codon, mut_codon, n_changes = self._mutant_codon(wt_res, res_num, mut_res, verbose)
+
+        start_ix, end_ix, good_melting_temp, gc_percent, melting_temp = self._find_primer_window(
+            (res_num - first_res)*3, mut_codon, verbose)
+        forward_primer = sequence[start_ix:(res_num - first_res)*3]+mut_codon+sequence[(res_num+1 - first_res)*3:end_ix]
+        forward_primer = forward_primer.lower()
+        reverse_primer = reverse_complement(forward_primer)
 
-        return forward_primer, reverse_primer
+        return PrimerDesign(str(wt_res)+str(res_num)+str(mut_res), forward_primer, reverse_primer,
+                            len(forward_primer), melting_temp, gc_percent, wt_codon, mut_codon,
+                            n_changes, good_melting_temp)
 
-    def _make_mutant(wt_codon, mut_codons):
+    @instrumentation.timed
+    def place_primers(self, codon_starts, mut_codons, constraints=None):
         """
-        Finds the mutant codon, if mutation requires more than 1 nucleotide change
+        Chooses the primer window around each of many mutant codons by scoring every
+        (start, end) window at once, instead of growing a single window step by step
+        as make_single_mutant() does
+
+        For each codon, windows with 0 to max_length-3 nucleotides on either side form
+        a matrix; prefix sums of GC content over the wild type, corrected for the
+        mutant codon, give the GC content, melting temp, length and GC clamp of every
+        window in one pass, for a batch of codons at a time. Of the windows meeting
+        the constraints, the shortest is chosen, then the one with the codon closest
+        to its center, then the one with the highest melting temp. If none meets them,
+        the window of acceptable length and flanks with the highest melting temp is
+        returned, flagged as not good
 
         Arguments:
         ----------
-            wt_codon : str
-                len(wt_codon) = 3
-                nucleotide codon from the wild type sequence for the residue to be mutated
-            mut_codons : list(str)
-                all codons that translate to desired mutant residue
+            codon_starts : list of int
+                index of the first nucleotide of each mutated codon
+            mut_codons : list of str
+                mutant codon placed at each
+            Optional:
+            ---------
+                constraints : PrimerConstraints
+                    (default = PrimerConstraints(), the criteria of make_single_mutant())
         Returns:
         --------
-            mut_codon : str
-                codon selected from mut_codons which requires the fewest changes from
-                the wild type codon
+            start_ix : numpy.ndarray of int
+                index of the first nucleotide of each chosen primer
+            end_ix : numpy.ndarray of int
+                index after the final nucleotide of each chosen primer
+            good_melting_temp : numpy.ndarray of bool
+                False where no window meets the constraints
+            gc_percent : numpy.ndarray of float
+                GC content of each chosen primer in %
+            melting_temp : numpy.ndarray of float
+                melting temp of each chosen primer in C
         """
-        mut_codons = [DNASequence(codon) for codon in mut_codons]
-        distances = [wt_codon.distance(codon) for codon in mut_codons]
+        if constraints is None:
+            constraints = PrimerConstraints()
+        length_sequence = len(self.sequence)
+        gc_prefix = np.array(self._gc_prefix, dtype=np.int64)
+        bases = np.frombuffer(self.sequence.encode('ascii'), dtype=np.uint8)
+        is_gc = np.append((bases == ord('G')) | (bases == ord('C')), False)
+
+        results = []
+        for batch in range(0, len(codon_starts), _PLACEMENT_BATCH):
+            codons = [codon.upper() for codon in mut_codons[batch:batch+_PLACEMENT_BATCH]]
+            codon_start = np.asarray(codon_starts[batch:batch+_PLACEMENT_BATCH], dtype=np.int64)[:, np.newaxis, np.newaxis]
+            codon_end = codon_start+3
+            # nucleotides of template left and right of the codon in each window, from
+            # the shortest flank any codon of the batch may have up to max_length
+            min_left = min(constraints.min_flank, int(codon_start.min()))
+            min_right = min(constraints.min_flank, int(length_sequence - codon_end.max()))
+            lefts = np.arange(min_left, max(constraints.max_length-3-min_right, min_left)+1)
+            rights = np.arange(min_right, max(constraints.max_length-3-min_left, min_right)+1)
+            left = lefts[:, np.newaxis]
+            right = rights[np.newaxis, :]
+            length = left + 3 + right
+            imbalance = np.abs(left - right)
+
+            start = codon_start - left
+            end = codon_end + right
+            fits = (start >= 0) & (end <= length_sequence)
+            fits &= (length >= constraints.min_length) & (length <= constraints.max_length)
+            # flanks of min_flank, or as long as the sequence allows
+            fits &= left >= np.minimum(constraints.min_flank, codon_start)
+            fits &= right >= np.minimum(constraints.min_flank, length_sequence - codon_end)
+            start = np.clip(start, 0, length_sequence)
+            end = np.clip(end, 0, length_sequence)
 
-        changed_bp = int(min(distances)*3)
-        print("This mutant required "+str(changed_bp)+"bp modifications\n")
-        # choose the codon that requires fewest changes
-        return mut_codons[distances.index(min(distances))].sequence
+            codon_gc = np.array([codon.count('G') + codon.count('C') for codon in codons])[:, np.newaxis, np.newaxis]
+            gc_count = gc_prefix[end] - gc_prefix[start] + codon_gc - (gc_prefix[codon_end] - gc_prefix[codon_start])
+            # as _melting_temp(), element by element
+            gc_percent = gc_count / length.astype(float) * 100.0
+            melting_temp = 81.5 + 0.41*gc_percent - 675.0/length - 1.000/length*100.0
 
+            good = fits & (melting_temp >= constraints.min_melting_temp)
+            if constraints.max_melting_temp is not None:
+                good &= melting_temp <= constraints.max_melting_temp
+            good &= (gc_percent >= constraints.min_gc_percent) & (gc_percent <= constraints.max_gc_percent)
+            if constraints.gc_clamp:
+                # end bases come from the mutant codon when it is at the end
+                first_gc = np.where(left == 0, np.array([codon[0] in 'GC' for codon in codons])[:, np.newaxis, np.newaxis],
+                                    is_gc[start])
+                last_gc = np.where(right == 0, np.array([codon[-1] in 'GC' for codon in codons])[:, np.newaxis, np.newaxis],
+                                   is_gc[np.maximum(end-1, 0)])
+                good &= (first_gc | (start == 0)) & (last_gc | (end == length_sequence))
 
+            # shortest, then most centered, then hottest; each term outweighs the next
+            score = np.where(good, length*4096.0 + imbalance*64.0 - melting_temp/256.0, np.inf)
+            fallback = np.where(fits, -melting_temp, np.inf)
+            found = good.reshape(len(codons), -1).any(axis=1)
+            score = np.where(found[:, np.newaxis, np.newaxis], score, fallback).reshape(len(codons), -1)
+            best = score.argmin(axis=1)
+            rows = np.arange(len(codons))
+            best_left = lefts[best // len(rights)]
+            best_right = rights[best % len(rights)]
+            results.append((codon_start[:, 0, 0] - best_left, codon_start[:, 0, 0] + 3 + best_right, found,
+                            gc_percent.reshape(len(codons), -1)[rows, best],
+                            melting_temp.reshape(len(codons), -1)[rows, best]))
+            if instrumentation.active:
+                instrumentation.count('primer_windows_scored', len(codons)*length.size)
+        if not results:
+            return tuple(np.empty(0, dtype=dtype) for dtype in [np.int64, np.int64, bool, float, float])
+        return tuple(np.concatenate(values) for values in zip(*results))
 
+    def _place_designs(self, mutations, constraints, verbose=False):
+        """
+        Does the work of make_mutants() and saturation_library() with place_primers()
+
+        Arguments:
+        ----------
+            mutations : list of (char, int, char)
+                (wt_res, res_num, mut_res) of each mutant
+            constraints : PrimerConstraints
+            verbose : Bool
+                if verbose==True, print melting temps and warnings (default = False)
+        Returns:
+        --------
+            designs : list of PrimerDesign
+        """
+        # warnings are printed below, in order with each design's melting temp
+        codons = [self._mutant_codon(wt_res, res_num, mut_res, verbose=False) for wt_res, res_num, mut_res in mutations]
+        codon_starts = [(res_num - self.first_res)*3 for wt_res, res_num, mut_res in mutations]
+        start_ix, end_ix, good_melting_temp, gc_percent, melting_temp = self.place_primers(
+            codon_starts, [mut_codon for wt_codon, mut_codon, n_changes in codons], constraints)
 
+        designs = []
+        sequence = self.sequence
+        for k, (wt_res, res_num, mut_res) in enumerate(mutations):
+            wt_codon, mut_codon, n_changes = codons[k]
+            good = bool(good_melting_temp[k])
+            if n_changes != 1 and verbose:
+                print("Cannot make desired mutant with a single base change")
+                print("This mutant required "+str(n_changes)+"bp modifications\n")
+            forward_primer = (sequence[start_ix[k]:codon_starts[k]]+mut_codon+sequence[codon_starts[k]+3:end_ix[k]]).lower()
+            if not good:
+                if instrumentation.active:
+                    instrumentation.warn('melting_temp_not_found', "Acceptable melting temp was not found",
+                                         codon_start=codon_starts[k], melting_temp=float(melting_temp[k]))
+                if verbose:
+                    print("Acceptable melting temp was not found")
+            elif verbose:
+                print("Melting temp: "+str(float(melting_temp[k]))+"C\n")
+            designs.append(PrimerDesign(str(wt_res)+str(res_num)+str(mut_res), forward_primer,
+                                        reverse_complement(forward_primer), len(forward_primer),
+                                        float(melting_temp[k]), float(gc_percent[k]), wt_codon, mut_codon,
+                                        n_changes, good))
+        return designs
+
+def _melting_temp(gc_count, N):
+    """
+    Calculates GC content and melting temp of a primer carrying one mismatch to the
+    template
+
+    Arguments:
+    ----------
+        gc_count : int
+            number of g and c nucleotides in the primer
+        N : int
+            number of nucleotides in the primer
+    Returns:
+    --------
+        gc_percent : float
+            GC content in %
+        melting_temp : float
+            melting temp in C
+    """
+    gc_percent = float(gc_count) / N * 100.0
+    mismatch_percent = 1.000 / N * 100.0
+    melting_temp = 81.5 + 0.41*gc_percent - 675.0/N - mismatch_percent
+    return gc_percent, melting_temp
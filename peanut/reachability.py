@@ -0,0 +1,250 @@
+"""
+Defines class ReachabilityIndex, which records for every residue of a construct the
+amino acids it can be mutated to, the minimum number of nucleotide changes each
+needs within its codon, and the codons that get there, so that candidate resistance
+mutants can be screened without designing primers or enumerating mutant sets
+
+The index is built once per construct: codons are looked up in a table of the 64
+codons against the 20 amino acids, so building it is one pass over the sequence and
+each query is a lookup
+
+Dependencies:
+    Requires NumPy
+"""
+from collections import namedtuple
+
+import numpy as np
+
+from peanut.codon_table import SYNONYMS, translate
+from peanut.primer_design import AMINO_ACIDS, best_codon, codon_distance
+
+# one mutation of a residue of the construct
+#     res_num : int, residue id number
+#     wt_res, mut_res : char, wild type and mutant residues
+#     distance : int, minimum number of nucleotide changes within the codon
+#     codons : tuple of str, every codon of mut_res needing that many changes
+#     best_codon : str, the codon PrimerGenerator uses for this mutation
+Reach = namedtuple('Reach', ['res_num', 'wt_res', 'mut_res', 'distance', 'codons', 'best_codon'])
+
+# codon -> (distances to each of AMINO_ACIDS, closest codons of each)
+_CODON_REACH = {}
+
+def _codon_reach(codon):
+    """
+    Minimum changes from a codon to each amino acid, and the codons that reach it
+    with that many changes; codons with unknown bases are compared base by base
+    """
+    if codon not in _CODON_REACH:
+        distances = []
+        codons = []
+        for residue in AMINO_ACIDS:
+            residue_distances = [codon_distance(codon, synonym) for synonym in SYNONYMS[residue]]
+            distance = min(residue_distances)
+            distances.append(distance)
+            codons.append(tuple(synonym for synonym, synonym_distance in zip(SYNONYMS[residue], residue_distances)
+                                if synonym_distance == distance))
+        _CODON_REACH[codon] = tuple(distances), tuple(codons)
+    return _CODON_REACH[codon]
+
+class ReachabilityIndex(object):
+    """
+    Constructor:
+    ------------
+        ReachabilityIndex(sequence, first_res=1)
+        Arguments:
+        ----------
+            sequence : str
+                DNA nucleotide sequence, starting on the correct reading frame
+            first_res : int
+                residue id number of first residue in sequence (default = 1)
+
+    Attributes:
+    -----------
+        self.aa_sequence : str
+            translated wild type
+        self.first_res : int
+            residue id number of the first residue
+        self.wt_codons : list of str
+            wild type codon of each residue
+        self.distances : numpy.ndarray of uint8, shape (n_residues, 20)
+            minimum number of nucleotide changes from each residue to each amino acid
+            of AMINO_ACIDS; 0 for the wild type residue itself
+    Methods:
+    --------
+        distance(), codons(), reach()
+            minimum changes, closest codons, or both with PrimerGenerator's codon,
+            for one residue and one mutant residue
+        reachable()
+            every amino acid one residue can reach with up to max_mutations changes
+        reachable_matrix(), iter_reaches()
+            the same for every residue at once
+        positions()
+            every residue id where a given change, e.g. T to I, is reachable
+    """
+    def __init__(self, sequence, first_res=1):
+        """
+        Arguments:
+        ----------
+            sequence : str
+                DNA nucleotide sequence, starting on the correct reading frame
+            first_res : int
+                residue id number of first residue in sequence (default = 1)
+        """
+        sequence = sequence.upper().replace('U', 'T')
+        self.aa_sequence = translate(sequence)
+        self.first_res = first_res
+        self.wt_codons = [sequence[k*3:k*3+3] for k in range(len(self.aa_sequence))]
+        self._reach = [_codon_reach(codon) for codon in self.wt_codons]
+        self.distances = np.array([distances for distances, codons in self._reach], dtype=np.uint8).reshape(
+            len(self.wt_codons), len(AMINO_ACIDS))
+        self._columns = dict((residue, k) for k, residue in enumerate(AMINO_ACIDS))
+        # (wt_res, mut_res) -> residue ids reachable with exactly 1, 2 and 3 changes
+        self._changes = {}
+        for k, (wt_res, (distances, codons)) in enumerate(zip(self.aa_sequence, self._reach)):
+            for mut_res, distance in zip(AMINO_ACIDS, distances):
+                if mut_res != wt_res:
+                    self._changes.setdefault((wt_res, mut_res), ([], [], []))[distance-1].append(k+first_res)
+        return
+
+    def __len__(self):
+        return len(self.aa_sequence)
+
+    def _row(self, res_num):
+        row = res_num - self.first_res
+        if row < 0 or row >= len(self.aa_sequence):
+            raise IOError("Residue "+str(res_num)+" not found -- check residue id and first residue id")
+        return row
+
+    def _column(self, mut_res):
+        if mut_res not in self._columns:
+            raise IOError("Unknown amino acid "+str(mut_res))
+        return self._columns[mut_res]
+
+    def distance(self, res_num, mut_res):
+        """
+        Arguments:
+        ----------
+            res_num : int
+                residue id number
+            mut_res : char
+                single letter amino acid code of mutant residue
+        Returns:
+        --------
+            distance : int
+                minimum number of nucleotide changes to make mut_res at res_num; 0 if
+                mut_res is the wild type residue
+        """
+        return self._reach[self._row(res_num)][0][self._column(mut_res)]
+
+    def codons(self, res_num, mut_res):
+        """
+        Arguments:
+        ----------
+            res_num : int
+                residue id number
+            mut_res : char
+                single letter amino acid code of mutant residue
+        Returns:
+        --------
+            codons : tuple of str
+                every codon of mut_res needing the minimum number of changes
+        """
+        return self._reach[self._row(res_num)][1][self._column(mut_res)]
+
+    def reach(self, res_num, mut_res):
+        """
+        Arguments:
+        ----------
+            res_num : int
+                residue id number
+            mut_res : char
+                single letter amino acid code of mutant residue
+        Returns:
+        --------
+            reach : Reach
+                distance, closest codons and the codon PrimerGenerator would use
+        """
+        row = self._row(res_num)
+        wt_res = self.aa_sequence[row]
+        return Reach(res_num, wt_res, mut_res, self.distance(res_num, mut_res), self.codons(res_num, mut_res),
+                     best_codon(self.wt_codons[row], mut_res)[0])
+
+    def reachable(self, res_num, max_mutations=1):
+        """
+        Arguments:
+        ----------
+            res_num : int
+                residue id number
+            Optional:
+            ---------
+                max_mutations : int
+                    maximum number of nucleotide changes (default = 1)
+        Returns:
+        --------
+            reachable : dict
+                mutant residue -> minimum number of changes, for every amino acid other
+                than the wild type reachable with up to max_mutations changes
+        """
+        row = self._row(res_num)
+        wt_res = self.aa_sequence[row]
+        return dict((mut_res, distance) for mut_res, distance in zip(AMINO_ACIDS, self._reach[row][0])
+                    if mut_res != wt_res and distance <= max_mutations)
+
+    def reachable_matrix(self, max_mutations=1):
+        """
+        Arguments:
+        ----------
+            Optional:
+            ---------
+                max_mutations : int
+                    maximum number of nucleotide changes (default = 1)
+        Returns:
+        --------
+            reachable : numpy.ndarray of bool, shape (n_residues, 20)
+                True where the amino acid of AMINO_ACIDS in that column differs from
+                the wild type and is reachable with up to max_mutations changes
+        """
+        return (self.distances > 0) & (self.distances <= max_mutations)
+
+    def iter_reaches(self, max_mutations=1):
+        """
+        Arguments:
+        ----------
+            Optional:
+            ---------
+                max_mutations : int
+                    maximum number of nucleotide changes (default = 1)
+        Yields:
+        -------
+            reach : Reach
+                every mutation reachable with up to max_mutations changes, ordered by
+                residue, then by mutant residue
+        """
+        for row, wt_res in enumerate(self.aa_sequence):
+            for mut_res, distance in zip(AMINO_ACIDS, self._reach[row][0]):
+                if mut_res != wt_res and distance <= max_mutations:
+                    yield self.reach(row + self.first_res, mut_res)
+
+    def positions(self, wt_res, mut_res, max_mutations=1):
+        """
+        Finds every residue where a change from wt_res to mut_res is reachable
+
+        Arguments:
+        ----------
+            wt_res : char
+                single letter amino acid code of wild type residue
+            mut_res : char
+                single letter amino acid code of mutant residue
+            Optional:
+            ---------
+                max_mutations : int
+                    maximum number of nucleotide changes (default = 1)
+        Returns:
+        --------
+            res_nums : list of int
+                residue id numbers, in increasing order
+        """
+        changes = self._changes.get((wt_res, mut_res), ([], [], []))
+        if max_mutations == 1:
+            return list(changes[0])
+        return sorted(res_num for distance in range(min(max_mutations, 3)) for res_num in changes[distance])
@@ -0,0 +1,216 @@
+"""
+Streams sequence records from FASTA, FASTQ and plain sequence files (.txt, .seq),
+one record at a time, so a file of any number of records is read in memory
+proportional to its longest record
+
+Plain sequence files hold a single sequence, possibly wrapped over several lines,
+and give one record named after the file. The format is guessed from the first
+non-blank line unless given: '>' starts FASTA, '@' starts FASTQ, anything else is
+read as plain sequence
+
+Large files can be memory-mapped instead of read through a buffered file object
+"""
+from collections import namedtuple
+import mmap
+import os.path
+
+# one record of a sequence file
+#     name : str, FASTA / FASTQ header without its '>' or '@', or the file name for
+#         plain sequence files
+#     sequence : str, with line breaks and surrounding whitespace removed
+#     quality : str, FASTQ quality string, None for other formats
+SequenceRecord = namedtuple('SequenceRecord', ['name', 'sequence', 'quality'])
+
+FORMATS = ['fasta', 'fastq', 'plain']
+# first character of a file -> format; anything else is plain sequence
+_FORMAT_BY_START = {'>': 'fasta', '@': 'fastq'}
+
+def guess_format(filename):
+    """
+    Guesses the format of a sequence file from its first non-blank line
+
+    Arguments:
+    ----------
+        filename : str
+    Returns:
+    --------
+        format : str
+            one of FORMATS; 'plain' for an empty file
+    """
+    with open(filename, 'r') as fi:
+        for line in fi:
+            if line.strip():
+                return _FORMAT_BY_START.get(line.lstrip()[0], 'plain')
+    return 'plain'
+
+def read_sequences(source, format=None, memory_map=False):
+    """
+    Iterates lazily over the records of a sequence file
+
+    Arguments:
+    ----------
+        source : str or file
+            filename, or a file object open for reading text
+        Optional:
+        ---------
+            format : str
+                one of FORMATS; guessed from the first non-blank line if None
+                (default = None)
+            memory_map : Bool
+                if memory_map==True, memory-map the file instead of reading it through
+                a buffered file object; source must be a filename (default = False)
+    Returns:
+    --------
+        records : generator of SequenceRecord
+    """
+    if format is not None and format not in FORMATS:
+        raise IOError("unknown sequence format "+str(format)+"; expected one of "+", ".join(FORMATS))
+    if isinstance(source, str):
+        name = os.path.splitext(os.path.basename(source))[0]
+        if memory_map:
+            return _parse(_mapped_lines(source), format, name)
+        return _parse(_file_lines(source), format, name)
+    if memory_map:
+        raise IOError("memory_map needs a filename, not a file object")
+    name = os.path.splitext(os.path.basename(str(getattr(source, 'name', 'sequence'))))[0]
+    return _parse(iter(source), format, name)
+
+def read_sequence(source, format=None):
+    """
+    Returns the sequence of the first record of a sequence file, as the scripts used
+    to read the first line of a file
+
+    Arguments:
+    ----------
+        source : str or file
+            filename, or a file object open for reading text
+        Optional:
+        ---------
+            format : str
+                one of FORMATS; guessed from the first non-blank line if None
+    Returns:
+    --------
+        sequence : str
+    """
+    records = read_sequences(source, format)
+    try:
+        for record in records:
+            return record.sequence
+    finally:
+        records.close()
+    raise IOError("no sequence found in "+str(getattr(source, 'name', source)))
+
+def write_fasta(records, fo, width=None):
+    """
+    Writes records as FASTA
+
+    Arguments:
+    ----------
+        records : iterable of (name, sequence, ...)
+            e.g. SequenceRecord
+        fo : file
+            file object open for writing text
+        Optional:
+        ---------
+            width : int
+                wrap sequences to lines of this many characters; None writes each
+                sequence on one line (default = None)
+    """
+    for record in records:
+        sequence = record[1]
+        fo.write(">"+record[0]+"\n")
+        if width is None:
+            fo.write(sequence+"\n")
+        else:
+            for start in range(0, len(sequence), width):
+                fo.write(sequence[start:start+width]+"\n")
+
+def _file_lines(filename):
+    with open(filename, 'r') as fi:
+        for line in fi:
+            yield line
+
+def _mapped_lines(filename):
+    with open(filename, 'rb') as fi:
+        if os.fstat(fi.fileno()).st_size == 0:
+            return
+        mapped = mmap.mmap(fi.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            for line in iter(mapped.readline, b''):
+                yield line.decode('ascii')
+        finally:
+            mapped.close()
+
+def _parse(lines, format, name):
+    """
+    Splits lines of text into records
+    """
+    lines = iter(lines)
+    try:
+        for first in lines:
+            if first.strip():
+                break
+        else:
+            return
+        if format is None:
+            format = _FORMAT_BY_START.get(first.lstrip()[0], 'plain')
+        if format == 'fasta':
+            records = _parse_fasta(first, lines)
+        elif format == 'fastq':
+            records = _parse_fastq(first, lines)
+        else:
+            records = iter([SequenceRecord(name, first.strip()+"".join(line.strip() for line in lines), None)])
+        for record in records:
+            yield record
+    finally:
+        # close the underlying file if the caller stops early
+        if hasattr(lines, 'close'):
+            lines.close()
+
+def _parse_fasta(first, lines):
+    if not first.startswith('>'):
+        raise IOError("FASTA file does not start with a > header")
+    name = first[1:].strip()
+    parts = []
+    for line in lines:
+        if line.startswith('>'):
+            yield SequenceRecord(name, "".join(parts), None)
+            name = line[1:].strip()
+            parts = []
+        elif not line.startswith(';'):
+            parts.append(line.strip())
+    yield SequenceRecord(name, "".join(parts), None)
+
+def _parse_fastq(first, lines):
+    header = first
+    while header is not None:
+        if not header.strip():
+            header = next(lines, None)
+            continue
+        if not header.startswith('@'):
+            raise IOError("FASTQ record does not start with @: "+header.strip()[:40])
+        name = header[1:].strip()
+        parts = []
+        for line in lines:
+            if line.startswith('+'):
+                break
+            parts.append(line.strip())
+        else:
+            raise IOError("FASTQ record "+name+" has no + line")
+        sequence = "".join(parts)
+        # quality lines may start with '@' or '+', so read until the quality is as
+        # long as the sequence
+        parts = []
+        length = 0
+        while length < len(sequence):
+            line = next(lines, None)
+            if line is None:
+                raise IOError("FASTQ record "+name+" is truncated")
+            parts.append(line.strip())
+            length += len(parts[-1])
+        quality = "".join(parts)
+        if len(quality) != len(sequence):
+            raise IOError("FASTQ record "+name+" has "+str(len(quality))+" quality scores for "
+                          +str(len(sequence))+" bases")
+        yield SequenceRecord(name, sequence, quality)
+        header = next(lines, None)
@@ -1,9 +1,11 @@
 ########################################
 # to run this script:
 # python calculate_coefficients.py filename_aa_sequence 
+# the file may hold a single sequence, or any number of FASTA / FASTQ records
 ########################################
 
 from peanut.calculate_protein_constants import calculate_extinction_coeff, calculate_molecular_weight, calculate_absorbance
+from peanut.seqio import guess_format, read_sequences
 import sys
 
 # read from file
@@ -12,26 +14,29 @@ if len(sys.argv) == 2:
 else:
     raise IOError("command to run script: python calculate_coefficients.py filename_aminoacid_sequence")
 
-with open(filename, 'r') as fi:
-    aa_sequence = fi.readline()
-print(aa_sequence)
-
-secreted, cytosolic = calculate_extinction_coeff(aa_sequence)
-
-print("")
-print("Extinction Coefficient (Secreted Protein)")
-print(secreted)
-print("Extinction Coefficient (Cytosolic Protein)")
-print(cytosolic)
-
-molecular_weight = calculate_molecular_weight(aa_sequence)
-print(" ")
-print("Molecular Weight (g/mol)")
-print(molecular_weight)
-
-absorbance = calculate_absorbance(aa_sequence, secreted=secreted, molecular_weight=molecular_weight)
-print(" ")
-print("Absorbance")
-print(absorbance)
+plain = guess_format(filename) == 'plain'
+for record in read_sequences(filename):
+    aa_sequence = record.sequence
+    if not plain:
+        print(">"+record.name)
+    print(aa_sequence)
+
+    secreted, cytosolic = calculate_extinction_coeff(aa_sequence)
+
+    print("")
+    print("Extinction Coefficient (Secreted Protein)")
+    print(secreted)
+    print("Extinction Coefficient (Cytosolic Protein)")
+    print(cytosolic)
+
+    molecular_weight = calculate_molecular_weight(aa_sequence)
+    print(" ")
+    print("Molecular Weight (g/mol)")
+    print(molecular_weight)
+
+    absorbance = calculate_absorbance(aa_sequence, secreted=secreted, molecular_weight=molecular_weight)
+    print(" ")
+    print("Absorbance")
+    print(absorbance)
 
 
@@ -1,9 +1,11 @@
 ########################################
 # to run this script:
 # python calculate_extinction_coefficient.py filename_wildtype_sequence 
+# the file may hold a single sequence, or any number of FASTA / FASTQ records
 ########################################
 
 from peanut.calculate_protein_constants import calculate_extinction_coeff
+from peanut.seqio import guess_format, read_sequences
 import sys
 
 # read from file
@@ -12,15 +14,16 @@ if len(sys.argv) == 2:
 else:
     raise IOError("command to run script: python calculate_extinction_coefficient.py filename_aminoacid_sequence")
 
-with open(filename, 'r') as fi:
-    aa_sequence = fi.readline()
+plain = guess_format(filename) == 'plain'
+for record in read_sequences(filename):
+    secreted, cytosolic = calculate_extinction_coeff(record.sequence)
 
-secreted, cytosolic = calculate_extinction_coeff(aa_sequence)
-
-#print(AA_sequences)
-print("Extinction Coefficient (Secreted Protein)")
-print(secreted)
-print("Extinction Coefficient (Cytosolic Protein)")
-print(cytosolic)
+    #print(AA_sequences)
+    if not plain:
+        print(">"+record.name)
+    print("Extinction Coefficient (Secreted Protein)")
+    print(secreted)
+    print("Extinction Coefficient (Cytosolic Protein)")
+    print(cytosolic)
 
 
@@ -3,7 +3,9 @@
 # python count_mutants.py filename_wildtype_sequence 
 ########################################
 
-from peanut.convert_dna_to_aa import all_dna_point_mutants_to_aa
+from peanut.convert_dna_to_aa import count_point_mutants
+from peanut.cache import Cache
+from peanut.seqio import guess_format, read_sequence, read_sequences
 import sys
 
 # read from file
@@ -12,13 +14,13 @@ if len(sys.argv) == 2:
 else:
     raise IOError("command to run script: python count_single_mutants.py filename_wildtype_sequence")
 
-with open(filename, 'r') as fi:
-    wt_sequence = fi.readline()
-wt_sequence = wt_sequence[:-1]
-
-AA_sequences = all_dna_point_mutants_to_aa(wt_sequence)
-
-#print(AA_sequences)
-print(len(AA_sequences))
+# a FASTA / FASTQ file gives one count per record
+if guess_format(filename) == 'plain':
+    wt_sequence = read_sequence(filename)
+    n_sequences = Cache().fetch('point_mutant_count', wt_sequence, count_point_mutants, max_mutations=1)
+    print(n_sequences)
+else:
+    for record in read_sequences(filename):
+        print(record.name+"\t"+str(count_point_mutants(record.sequence, max_mutations=1)))
 
 
@@ -0,0 +1,40 @@
+########################################
+# Run this script:
+# python panel.py filename_wildtype_sequence first_residue X###X [X###X ...]
+# where each X###X is a desired point mutation
+# designs primers for the whole panel with a single PrimerGenerator
+########################################
+import os.path
+from peanut import primer_design
+from peanut.seqio import read_sequence
+import sys
+
+if len(sys.argv) < 4:
+    raise IOError("command to run script: python panel.py filename_wildtype_sequence first_residue X###X [X###X ...]")
+filename = sys.argv[1]
+first_residue = int(sys.argv[2])
+mutants = sys.argv[3:]
+
+#######################################
+
+# first record of a plain, FASTA or FASTQ file
+wt_sequence = read_sequence(filename)
+
+primer_generator = primer_design.PrimerGenerator(wt_sequence, first_res=first_residue)
+designs = primer_generator.make_mutants(mutants)
+
+print("\nmutant\tlength\tTm\tGC%\tcodon\tforward primer")
+for design in designs:
+    print(design.mutation+"\t"+str(design.length)+"\t"+"%.1f" % design.melting_temp+"\t"+"%.1f" % design.gc_percent
+          +"\t"+design.wt_codon+">"+design.mut_codon+"\t"+design.forward_primer)
+
+for design in designs:
+    outfilename = "../../primers/"+design.mutation+"_"+filename.split('/')[-1]
+    if not os.path.exists(outfilename):
+        with open(outfilename, 'w') as fo:
+            fo.write("Forward Primer\n")
+            fo.write(design.forward_primer)
+            fo.write("\nReverse Primer\n")
+            fo.write(design.reverse_primer)
+    else:
+        print("\nPrimer file exists for "+design.mutation+"; not overwritten")
@@ -0,0 +1,32 @@
+########################################
+# Run this script:
+# python saturation_library.py filename_wildtype_sequence first_residue
+# designs primers for every residue mutated to each of the 19 other amino acids
+# and writes them all to one table in primers/
+########################################
+import os.path
+from peanut import primer_design
+from peanut.seqio import read_sequence
+import sys
+
+if len(sys.argv) != 3:
+    raise IOError("command to run script: python saturation_library.py filename_wildtype_sequence first_residue")
+filename = sys.argv[1]
+first_residue = int(sys.argv[2])
+
+#######################################
+
+# first record of a plain, FASTA or FASTQ file
+wt_sequence = read_sequence(filename)
+
+primer_generator = primer_design.PrimerGenerator(wt_sequence, first_res=first_residue)
+
+outfilename = "../../primers/"+filename.split('/')[-1].split('.')[0]+"_saturation_library.tsv"
+if not os.path.exists(outfilename):
+    designs = primer_generator.saturation_library(filename=outfilename)
+    failed = [design.mutation for design in designs if not design.good_melting_temp]
+    print(str(len(designs))+" primer pairs written to "+outfilename)
+    if failed:
+        print("Acceptable melting temp was not found for "+str(len(failed))+" mutants")
+else:
+    print("\nPrimer table exists; not overwritten\n")
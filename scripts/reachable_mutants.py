@@ -0,0 +1,35 @@
+########################################
+# Run this script:
+# python reachable_mutants.py filename_wildtype_sequence first_residue [max_mutations] [X>Y]
+# lists the amino acids each residue can be mutated to with up to max_mutations
+# (default 1) nucleotide changes, with the codon primer design would use; with X>Y,
+# e.g. T>I, lists only the residues where that change is reachable
+########################################
+from peanut.reachability import ReachabilityIndex
+from peanut.seqio import read_sequence
+import sys
+
+if len(sys.argv) < 3:
+    raise IOError("command to run script: python reachable_mutants.py filename_wildtype_sequence first_residue "
+                  "[max_mutations] [X>Y]")
+filename = sys.argv[1]
+first_residue = int(sys.argv[2])
+max_mutations = int(sys.argv[3]) if len(sys.argv) > 3 else 1
+change = sys.argv[4] if len(sys.argv) > 4 else None
+
+#######################################
+
+# first record of a plain, FASTA or FASTQ file
+index = ReachabilityIndex(read_sequence(filename), first_res=first_residue)
+
+if change is not None:
+    wt_res, mut_res = change.split('>')
+    for res_num in index.positions(wt_res, mut_res, max_mutations):
+        reach = index.reach(res_num, mut_res)
+        print(reach.wt_res+str(res_num)+reach.mut_res+"\t"+str(reach.distance)+"\t"
+              +index.wt_codons[res_num-first_residue]+">"+reach.best_codon)
+else:
+    print("mutant\tchanges\tcodon")
+    for reach in index.iter_reaches(max_mutations):
+        print(reach.wt_res+str(reach.res_num)+reach.mut_res+"\t"+str(reach.distance)+"\t"
+              +index.wt_codons[reach.res_num-first_residue]+">"+reach.best_codon)
@@ -0,0 +1,27 @@
+########################################
+# to run this script:
+# python translate_reads.py output_filename path [path ...] [--workers N]
+# where each path is a sequence file, a directory of them, or a glob such as
+# "../reads/*.seq" (quoted)
+# picks the reading frame of each read with the fewest stop codons, translating on
+# a pool of worker processes, and writes one table with a status per read
+########################################
+
+from peanut.batch_translation import translate_reads, write_translations
+import sys
+
+args = sys.argv[1:]
+workers = None
+if '--workers' in args:
+    k = args.index('--workers')
+    workers = int(args[k+1])
+    args = args[:k] + args[k+2:]
+if len(args) < 2:
+    raise IOError("command to run script: python translate_reads.py output_filename path [path ...] [--workers N]")
+outfilename = args[0]
+paths = args[1:]
+
+status_counts = write_translations(translate_reads(paths, workers=workers), outfilename)
+
+for status in sorted(status_counts):
+    print(status+"\t"+str(status_counts[status]))
@@ -1,10 +1,13 @@
 ########################################
 # to run this script:
 # python translate_sequence.py filename_wildtype_sequence 
+# the file may hold a single sequence, or any number of FASTA / FASTQ records
 ########################################
 
 
 from peanut.convert_dna_to_aa import dna_to_aa
+from peanut.cache import Cache
+from peanut.seqio import guess_format, read_sequence, read_sequences, write_fasta
 import sys
 
 # read from file
@@ -13,19 +16,21 @@ if len(sys.argv) == 2:
 else:
     raise IOError("python count_mutants.py filename_wildtype_sequence")
 
-with open(filename, 'r') as fi:
-    sequence = fi.readline()
-sequence = sequence[:-1]
+plain = guess_format(filename) == 'plain'
 
-AA_sequence = dna_to_aa(sequence)
+outname = filename
+if outname.find('/') != -1:
+    outname = outname.split('/')[-1]
 
-if filename.find('/') != -1:
-    filename = filename.split('/')[-1]
-
-namebits = filename.split('.')
+namebits = outname.split('.')
 outfilename = "../aminoacid_sequences/"+namebits[0]+"_TRANSLATED."+namebits[1]
 with open(outfilename, 'w') as fo:
-    fo.write(AA_sequence)
-print(AA_sequence)
-
-
+    if plain:
+        AA_sequence = Cache().fetch('translation', read_sequence(filename), dna_to_aa)
+        fo.write(AA_sequence)
+        print(AA_sequence)
+    else:
+        for record in read_sequences(filename):
+            AA_sequence = dna_to_aa(record.sequence)
+            write_fasta([(record.name, AA_sequence)], fo)
+            print(record.name+"\t"+AA_sequence)
@@ -1,15 +1,34 @@
-with open("../aminoacid_sequences/4_Src_orf_TRANSLATED.txt",'r') as fi:
-    src4 = fi.readline()[:-1]
+########################################
+# to run this script:
+# python whose_src_is_it_anyway.py [filename_translated_clone [reference ...]]
+# where each reference is an amino acid sequence file, a directory of them, or a FASTA
+# finds the reference the translated clone matches best, by default the 4_Src_orf
+# clone against Human_SRC and Chicken_SRC
+########################################
 
-with open("../aminoacid_sequences/Human_SRC.txt",'r') as fi:
-    human = fi.readline()[:-1]
+from peanut.identify import ReferenceIndex
+from peanut.seqio import read_sequence
+import sys
 
-with open("../aminoacid_sequences/Chicken_SRC.txt",'r') as fi:
-    chicken = fi.readline()[:-1]
+if len(sys.argv) > 1:
+    clone = sys.argv[1]
+else:
+    clone = "../aminoacid_sequences/4_Src_orf_TRANSLATED.txt"
+references = sys.argv[2:] or ["../aminoacid_sequences/Human_SRC.txt", "../aminoacid_sequences/Chicken_SRC.txt"]
+
+index = ReferenceIndex.from_paths(references)
+identifications = index.identify(read_sequence(clone), n_best=2)
+
+if not identifications:
+    print("No reference matches the clone")
+    sys.exit(1)
 
-if src4.find(human) != -1:
-    print("Human Src!")
-elif src4.find(chicken) != -1:
-    print("Chicken Src!")
+best = identifications[0]
+# the whole reference is found unchanged in the clone
+if best.identity == 1.0 and best.coverage == 1.0:
+    print(best.reference+"!")
 else:
-    print("Messed up Src?")
+    print("Messed up "+best.reference+"?")
+for identification in identifications:
+    print(identification.reference+"\t"+"%.1f%% identity" % (100*identification.identity)
+          +"\t"+"%.1f%% coverage" % (100*identification.coverage))
@@ -7,4 +7,6 @@ setup(name='peanut',
       author='Julie M. Behr',
       author_email='julie.behr@choderalab.org',
       packages=['peanut'],
+      install_requires=['numpy'],
+      entry_points={'console_scripts': ['peanut = peanut.cli:main']},
       zip_safe=False)
@@ -0,0 +1,74 @@
+"""
+Tests the on-disk cache: round trips, keys, LRU eviction, corrupt entries and
+invalidation
+"""
+import os
+
+from peanut.cache import Cache
+
+def test_put_get_round_trip(tmp_path):
+    cache = Cache(str(tmp_path))
+    key = cache.key('translation', 'ATGGCC')
+    assert cache.get(key) == (False, None)
+    cache.put(key, {'aa_sequence': 'MA'})
+    assert cache.get(key) == (True, {'aa_sequence': 'MA'})
+    assert [entry[0] for entry in cache.entries()] == [key]
+
+def test_fetch_computes_once(tmp_path):
+    cache = Cache(str(tmp_path))
+    calls = []
+    def compute(sequence, max_mutations):
+        calls.append(sequence)
+        return len(sequence)*max_mutations
+    assert cache.fetch('count-mutants', 'ATGGCC', compute, max_mutations=2) == 12
+    assert cache.fetch('count-mutants', 'ATGGCC', compute, max_mutations=2) == 12
+    assert calls == ['ATGGCC']
+
+def test_key_digests_sequence_and_settings():
+    key = Cache.key('count-mutants', 'ATGGCC', max_mutations=2)
+    assert key.startswith('count-mutants-')
+    assert key == Cache.key('count-mutants', 'ATGGCC', max_mutations=2)
+    assert key != Cache.key('count-mutants', 'ATGGCC', max_mutations=3)
+    assert key != Cache.key('count-mutants', 'ATGGCA', max_mutations=2)
+    assert key != Cache.key('translation', 'ATGGCC', max_mutations=2)
+    # settings are serialized with sorted keys, so parameter order does not matter
+    assert Cache.key('k', 'A', a=1, b=2) == Cache.key('k', 'A', b=2, a=1)
+
+def test_evicts_least_recently_used(tmp_path):
+    cache = Cache(str(tmp_path), max_bytes=10**6)
+    value = b'x'*1000
+    keys = [cache.key('translation', sequence) for sequence in ['A', 'C', 'G']]
+    for k, key in enumerate(keys):
+        cache.put(key, value)
+        os.utime(cache._path(key), (1000+k, 1000+k))
+    # reading the oldest entry makes it the most recently used
+    assert cache.get(keys[0])[0]
+    size = sum(entry[1] for entry in cache.entries())
+    cache.max_bytes = size
+    cache.put(cache.key('translation', 'T'), value)
+    remaining = [entry[0] for entry in cache.entries()]
+    assert keys[1] not in remaining
+    assert keys[0] in remaining and keys[2] in remaining
+    assert sum(entry[1] for entry in cache.entries()) <= cache.max_bytes
+
+def test_corrupt_entry_is_a_miss(tmp_path):
+    cache = Cache(str(tmp_path))
+    key = cache.key('translation', 'ATGGCC')
+    cache.put(key, 'MA')
+    with open(cache._path(key), 'wb') as fo:
+        fo.write(b'not a pickle')
+    assert cache.get(key) == (False, None)
+    with open(cache._path(key), 'wb') as fo:
+        fo.write(b'')
+    assert cache.fetch('translation', 'ATGGCC', lambda sequence: 'MA') == 'MA'
+    assert cache.get(key) == (True, 'MA')
+
+def test_invalidate_hyphenated_kind(tmp_path):
+    cache = Cache(str(tmp_path))
+    cache.fetch('count-mutants', 'ACGT', lambda sequence, max_mutations: 1, max_mutations=2)
+    cache.fetch('translation', 'ACGT', lambda sequence: 'T')
+    cache.fetch('translation', 'ACGA', lambda sequence: 'T')
+    assert cache.invalidate('ACGT') == 2
+    assert [entry[0] for entry in cache.entries()] == [cache.key('translation', 'ACGA')]
+    assert cache.clear() == 1
+    assert cache.entries() == []
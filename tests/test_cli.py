@@ -0,0 +1,19 @@
+"""
+Tests batch runs of the command line interface
+"""
+import os.path
+
+from peanut.cache import Cache
+from peanut.cli import JobRunner, run_batch
+
+here = os.path.dirname(os.path.abspath(__file__))
+root = os.path.join(here, '..')
+
+def test_run_batch_writes_to_current_stdout(tmp_path, capsys):
+    jobs = [{'command': 'constants', 'filename': os.path.join(root, 'aminoacid_sequences', 'Abl.txt')},
+            {'command': 'no-such-command', 'filename': 'missing.txt'}]
+    n_failed = run_batch(jobs, JobRunner(cache=Cache(str(tmp_path))))
+    lines = capsys.readouterr().out.splitlines()
+    assert n_failed == 1
+    assert lines[0].startswith("0\tconstants\t")
+    assert lines[-1].startswith("1\tno-such-command\terror: unknown command")
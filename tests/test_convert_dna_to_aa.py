@@ -0,0 +1,85 @@
+"""
+Tests the point mutant enumerators of convert_dna_to_aa against a brute force over
+every combination of nucleotide changes, on random sequences and on sequences with
+internal stop codons
+"""
+import itertools
+import random
+
+import pytest
+
+from peanut import convert_dna_to_aa
+from peanut.codon_table import translate
+
+def brute_force_mutants(wt_sequence, max_mutations):
+    """
+    Translates every sequence up to max_mutations nucleotide changes from wt_sequence,
+    keeping those with no stop codon before the last residue, and the wild type
+    """
+    AA_sequences = set([translate(wt_sequence)])
+    for n_mutations in range(1, max_mutations+1):
+        for positions in itertools.combinations(range(len(wt_sequence)), n_mutations):
+            for bases in itertools.product('ACGT', repeat=n_mutations):
+                if any(wt_sequence[position] == base for position, base in zip(positions, bases)):
+                    continue
+                mutant = list(wt_sequence)
+                for position, base in zip(positions, bases):
+                    mutant[position] = base
+                aa_sequence = translate("".join(mutant))
+                if '*' not in aa_sequence[:-1]:
+                    AA_sequences.add(aa_sequence)
+    return AA_sequences
+
+def wt_sequences():
+    # wild types with internal and trailing stops, then random sequences of up to five
+    # codons, some with a trailing partial codon
+    sequences = ['ATGTAAGGCTGATTT', 'TAATAGTGA', 'TGGTGG', 'ATGGCC']
+    rs = random.Random(11)
+    for k in range(20):
+        length = rs.choice([3, 6, 9, 12, 15]) + rs.choice([0, 0, 1])
+        sequences.append("".join(rs.choice('ACGT') for j in range(length)))
+    return sequences
+
+@pytest.mark.parametrize('max_mutations', [1, 2, 3])
+@pytest.mark.parametrize('wt_sequence', wt_sequences())
+def test_point_mutants_match_brute_force(wt_sequence, max_mutations):
+    expected = brute_force_mutants(wt_sequence, max_mutations)
+    assert convert_dna_to_aa.point_mutants_to_aa(wt_sequence, max_mutations) == expected
+    assert convert_dna_to_aa.point_mutants_to_aa(wt_sequence, max_mutations, compact=True).to_set() == expected
+    assert convert_dna_to_aa.count_point_mutants(wt_sequence, max_mutations) == len(expected)
+
+    mutants = list(convert_dna_to_aa.iter_point_mutants_to_aa(wt_sequence, max_mutations))
+    assert len(mutants) == len(set(mutants))
+    assert set(mutants) == expected
+    assert mutants[0] == translate(wt_sequence)
+
+    aa_sequence = translate(wt_sequence)
+    deltas = list(convert_dna_to_aa.iter_point_mutants_to_aa(wt_sequence, max_mutations, deltas=True))
+    assert [convert_dna_to_aa.apply_deltas(aa_sequence, delta) for delta in deltas] == mutants
+
+@pytest.mark.parametrize('wt_sequence', wt_sequences())
+def test_single_and_double_mutants_match_brute_force(wt_sequence):
+    singles = brute_force_mutants(wt_sequence, 1)
+    assert convert_dna_to_aa.all_dna_point_mutants_to_aa(wt_sequence) == singles
+    assert convert_dna_to_aa.all_dna_point_mutants_to_aa(wt_sequence, compact=True).to_set() == singles
+    assert set(convert_dna_to_aa.iter_dna_point_mutants_to_aa(wt_sequence)) == singles
+
+    doubles = brute_force_mutants(wt_sequence, 2)
+    assert convert_dna_to_aa.two_dna_point_mutants_to_aa(wt_sequence) == doubles
+    assert convert_dna_to_aa.two_dna_point_mutants_to_aa(wt_sequence, compact=True).to_set() == doubles
+    assert set(convert_dna_to_aa.iter_two_dna_point_mutants_to_aa(wt_sequence)) == doubles
+
+@pytest.mark.parametrize('max_mutations', [0, -1])
+def test_max_mutations_below_one_is_rejected(max_mutations):
+    wt_sequence = 'ATGTAAGGCTGATTT'
+    enumerators = [
+        lambda: convert_dna_to_aa.point_mutants_to_aa(wt_sequence, max_mutations),
+        lambda: convert_dna_to_aa.point_mutants_to_aa(wt_sequence, max_mutations, compact=True),
+        lambda: convert_dna_to_aa.point_mutants_to_aa(wt_sequence, max_mutations, workers=2),
+        lambda: list(convert_dna_to_aa.iter_point_mutants_to_aa(wt_sequence, max_mutations)),
+        lambda: convert_dna_to_aa.point_mutant_deltas(wt_sequence, max_mutations),
+        lambda: convert_dna_to_aa.count_point_mutants(wt_sequence, max_mutations),
+        lambda: convert_dna_to_aa.SequenceConverter(wt_sequence).point_mutants_to_aa(max_mutations, compact=True)]
+    for enumerate_mutants in enumerators:
+        with pytest.raises(ValueError):
+            enumerate_mutants()
@@ -0,0 +1,27 @@
+"""
+Tests that the light peanut modules import without pulling in a heavy dependency
+"""
+import os.path
+import subprocess
+import sys
+
+import pytest
+
+# modules that must not pull in a heavy dependency at import
+LIGHT = ['peanut.calculate_protein_constants', 'peanut.cache', 'peanut.cli']
+HEAVY = ['numpy', 'skbio', 'scipy', 'pandas', 'multiprocessing']
+
+root = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+
+PROBE = """
+import sys
+import %s
+print(' '.join(name for name in %r if name in sys.modules))
+"""
+
+@pytest.mark.parametrize('module', LIGHT)
+def test_light_module_imports_no_heavy_dependency(module):
+    # a fresh interpreter, so modules imported by other tests do not count
+    loaded = subprocess.check_output([sys.executable, '-c', PROBE % (module, HEAVY)],
+                                     cwd=root).decode().split()
+    assert loaded == []
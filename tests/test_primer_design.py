@@ -0,0 +1,152 @@
+"""
+Tests that the codon table lookups of primer_design choose the same codons and
+primers as the original codon-by-codon search, and that place_primers() chooses the
+same windows as trying every window one at a time
+"""
+import glob
+import os.path
+import random
+
+import pytest
+
+from peanut import instrumentation
+from peanut.codon_table import CODON_TABLE, CODONS, reverse_complement
+from peanut.primer_design import AMINO_ACIDS, PrimerConstraints, PrimerGenerator, best_codon, _melting_temp
+from peanut.seqio import read_sequence
+
+here = os.path.dirname(os.path.abspath(__file__))
+root = os.path.join(here, '..')
+
+# constructs and first residues the checked-in primers were designed from, as in
+# scripts/design_primers/
+CONSTRUCTS = {'Abl': 242, 'EGFR': 712, 'SRC': 270}
+# predates the current primer window search: the codon is the same (Met has only
+# ATG), but the forward primer is a 29 nt window where make_single_mutant() grows it
+# to 31 nt, and the reverse primer has an extra 3' base
+OUTDATED_PRIMERS = ['T790M_EGFR.txt']
+
+def reference_codon(wt_codon, mut_res):
+    """
+    The original rule: the last codon of mut_res one nucleotide change away from
+    wt_codon, in T, C, A, G order, or if there is none the first codon needing the
+    fewest changes
+    """
+    order = 'TCAG'
+    codons = [a+b+c for a in order for b in order for c in order]
+    synonyms = [codon for codon in codons if CODON_TABLE[CODONS.index(codon)] == mut_res]
+    changes = [sum(1 for x, y in zip(wt_codon, codon) if x != y) for codon in synonyms]
+    if 1 in changes:
+        k = len(changes) - 1 - changes[::-1].index(1)
+    else:
+        k = changes.index(min(changes))
+    return synonyms[k], changes[k]
+
+@pytest.mark.parametrize('wt_codon', CODONS)
+def test_best_codon_matches_reference(wt_codon):
+    for mut_res in AMINO_ACIDS:
+        assert best_codon(wt_codon, mut_res) == reference_codon(wt_codon, mut_res)
+
+def checked_in_primers():
+    filenames = sorted(glob.glob(os.path.join(root, 'primers', '*.txt')))
+    return [os.path.basename(filename) for filename in filenames
+            if os.path.basename(filename) not in OUTDATED_PRIMERS]
+
+@pytest.mark.parametrize('primer_file', checked_in_primers())
+def test_make_single_mutant_reproduces_primers(primer_file):
+    mutation, construct = primer_file[:-len('.txt')].split('_')
+    generator = PrimerGenerator(read_sequence(os.path.join(root, 'nucleotide_sequences', construct+'.txt')),
+                                first_res=CONSTRUCTS[construct])
+    with open(os.path.join(root, 'primers', primer_file), 'r') as fi:
+        lines = fi.read().split('\n')
+    forward_primer, reverse_primer = generator.make_single_mutant(mutation[0], int(mutation[1:-1]), mutation[-1])
+    assert forward_primer == lines[1]
+    assert reverse_primer == lines[3]
+
+def test_make_single_mutant_quiet(capsys):
+    generator = PrimerGenerator(read_sequence(os.path.join(root, 'nucleotide_sequences', 'Abl.txt')),
+                                first_res=CONSTRUCTS['Abl'])
+    with instrumentation.Collector() as collector:
+        quiet = generator.make_single_mutant('T', 315, 'W', verbose=False)
+    assert capsys.readouterr().out == ''
+    assert [event.name for event in collector.warnings()] == ['multiple_base_changes']
+    assert quiet == generator.make_single_mutant('T', 315, 'W')
+    assert 'single base change' in capsys.readouterr().out
+
+def brute_force_window(sequence, codon_start, mut_codon, constraints):
+    """
+    Tries every window around the codon in turn: of those meeting the constraints,
+    the shortest, then most centered, then hottest, then leftmost; if there are none,
+    the hottest, then leftmost, of acceptable length and flanks
+    """
+    best = None
+    fallback = None
+    for left in range(constraints.max_length-2):
+        for right in range(constraints.max_length-2):
+            start, end = codon_start-left, codon_start+3+right
+            length = end - start
+            if start < 0 or end > len(sequence) or not constraints.min_length <= length <= constraints.max_length:
+                continue
+            if left < min(constraints.min_flank, codon_start):
+                continue
+            if right < min(constraints.min_flank, len(sequence)-codon_start-3):
+                continue
+            primer = sequence[start:codon_start]+mut_codon+sequence[codon_start+3:end]
+            gc_percent, melting_temp = _melting_temp(primer.count('G')+primer.count('C'), length)
+            window = (start, end, gc_percent, melting_temp)
+            if fallback is None or (-melting_temp, left) < fallback[0]:
+                fallback = ((-melting_temp, left), window)
+            good = melting_temp >= constraints.min_melting_temp
+            if constraints.max_melting_temp is not None:
+                good = good and melting_temp <= constraints.max_melting_temp
+            good = good and constraints.min_gc_percent <= gc_percent <= constraints.max_gc_percent
+            if constraints.gc_clamp:
+                good = good and (primer[0] in 'GC' or start == 0) and (primer[-1] in 'GC' or end == len(sequence))
+            key = (length, abs(left-right), -melting_temp, left)
+            if good and (best is None or key < best[0]):
+                best = (key, window)
+    if best is not None:
+        return best[1] + (True,)
+    return fallback[1] + (False,)
+
+PLACEMENT_CONSTRAINTS = [PrimerConstraints(),
+                         PrimerConstraints(20, 30, 70.0, 85.0, 40.0, 60.0, True, 8),
+                         PrimerConstraints(min_flank=15, gc_clamp=False),
+                         PrimerConstraints(min_melting_temp=95.0)]
+
+def small_constructs():
+    rs = random.Random(5)
+    constructs = ["".join(rs.choice('ACGT') for k in range(length)) for length in [36, 90, 150]]
+    # the first 60 codons of Abl, with its runs of GC and AT
+    constructs.append(read_sequence(os.path.join(root, 'nucleotide_sequences', 'Abl.txt'))[:180].upper())
+    return constructs
+
+@pytest.mark.parametrize('constraints', PLACEMENT_CONSTRAINTS)
+@pytest.mark.parametrize('sequence', small_constructs(), ids=['random36', 'random90', 'random150', 'Abl180'])
+def test_place_primers_matches_brute_force(sequence, constraints):
+    generator = PrimerGenerator(sequence)
+    rs = random.Random(len(sequence))
+    codon_starts = [k*3 for k in range(len(sequence)//3)]
+    mut_codons = [rs.choice(['GCC', 'ATT', 'TGG', 'AAA', 'GGG']) for codon_start in codon_starts]
+    placed = generator.place_primers(codon_starts, mut_codons, constraints)
+    for k, (codon_start, mut_codon) in enumerate(zip(codon_starts, mut_codons)):
+        start, end, gc_percent, melting_temp, good = brute_force_window(sequence, codon_start, mut_codon, constraints)
+        assert (placed[0][k], placed[1][k], bool(placed[2][k])) == (start, end, good)
+        assert placed[3][k] == pytest.approx(gc_percent)
+        assert placed[4][k] == pytest.approx(melting_temp)
+
+@pytest.mark.parametrize('constraints', PLACEMENT_CONSTRAINTS[:2])
+def test_saturation_library_with_constraints(constraints):
+    sequence = small_constructs()[-1]
+    generator = PrimerGenerator(sequence, first_res=242)
+    designs = generator.saturation_library(constraints=constraints)
+    assert len(designs) == sum(19 for residue in generator.aa_sequence if residue in AMINO_ACIDS)
+    assert designs[:40] == generator.make_mutants([design.mutation for design in designs[:40]], verbose=False,
+                                                  constraints=constraints)
+    for design in designs:
+        codon_start = (int(design.mutation[1:-1]) - 242)*3
+        start, end, gc_percent, melting_temp, good = brute_force_window(sequence, codon_start, design.mut_codon,
+                                                                        constraints)
+        assert design.forward_primer == (sequence[start:codon_start]+design.mut_codon+sequence[codon_start+3:end]).lower()
+        assert design.reverse_primer == reverse_complement(design.forward_primer)
+        assert design.good_melting_temp == good
+        assert design.melting_temp == pytest.approx(melting_temp)
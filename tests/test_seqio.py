@@ -0,0 +1,113 @@
+"""
+Tests reading FASTA, FASTQ and plain sequence files, through buffered files and
+memory maps
+"""
+import io
+import os.path
+
+import pytest
+
+from peanut.seqio import SequenceRecord, guess_format, read_sequence, read_sequences, write_fasta
+
+here = os.path.dirname(os.path.abspath(__file__))
+root = os.path.join(here, '..')
+
+FASTA = """>first record
+ACGT
+acgt
+
+; a comment line
+AC
+>second
+>third  
+TTT
+"""
+
+# the quality of r1 is wrapped, and its second line starts with '@', and the quality of
+# r2 starts with '+', so neither may be taken for a header
+FASTQ = """@r1 lane 1
+ACGTAC
+GT
++
+IIII
+@III
+@r2
+
+ACG
++r2
++II
+"""
+
+def write(tmp_path, name, text):
+    path = tmp_path / name
+    path.write_text(text)
+    return str(path)
+
+@pytest.mark.parametrize('memory_map', [False, True])
+def test_fasta(tmp_path, memory_map):
+    filename = write(tmp_path, 'reads.fa', FASTA)
+    assert guess_format(filename) == 'fasta'
+    assert list(read_sequences(filename, memory_map=memory_map)) == [
+        SequenceRecord('first record', 'ACGTacgtAC', None),
+        SequenceRecord('second', '', None),
+        SequenceRecord('third', 'TTT', None)]
+
+@pytest.mark.parametrize('memory_map', [False, True])
+def test_fastq(tmp_path, memory_map):
+    filename = write(tmp_path, 'reads.fq', "\n"+FASTQ)
+    assert guess_format(filename) == 'fastq'
+    assert list(read_sequences(filename, memory_map=memory_map)) == [
+        SequenceRecord('r1 lane 1', 'ACGTACGT', 'IIII@III'),
+        SequenceRecord('r2', 'ACG', '+II')]
+
+@pytest.mark.parametrize('memory_map', [False, True])
+@pytest.mark.parametrize('text', ["ACGT\nACG\n", "  ACGT\n\nACG", "\nACGTACG\n\n"])
+def test_plain(tmp_path, memory_map, text):
+    filename = write(tmp_path, 'wt.txt', text)
+    assert guess_format(filename) == 'plain'
+    assert list(read_sequences(filename, memory_map=memory_map)) == [SequenceRecord('wt', 'ACGTACG', None)]
+    assert read_sequence(filename) == 'ACGTACG'
+
+def test_plain_file_without_trailing_newline():
+    # the scripts used to drop the last character of a line with readline()[:-1]
+    filename = os.path.join(root, 'nucleotide_sequences', 'AurKA.txt')
+    with open(filename, 'r') as fi:
+        text = fi.read()
+    assert not text.endswith("\n")
+    assert read_sequence(filename) == text
+
+@pytest.mark.parametrize('memory_map', [False, True])
+def test_empty_file(tmp_path, memory_map):
+    filename = write(tmp_path, 'empty.fa', "\n\n")
+    assert list(read_sequences(filename, memory_map=memory_map)) == []
+    with pytest.raises(IOError):
+        read_sequence(filename)
+
+def test_given_format_and_file_object():
+    records = read_sequences(io.StringIO(FASTA), format='fasta')
+    assert [record.name for record in records] == ['first record', 'second', 'third']
+    assert read_sequence(io.StringIO(">x\nAC\nGT\n")) == 'ACGT'
+    with pytest.raises(IOError):
+        list(read_sequences(io.StringIO(FASTA), format='genbank'))
+    with pytest.raises(IOError):
+        read_sequences(io.StringIO(FASTA), memory_map=True)
+    with pytest.raises(IOError):
+        list(read_sequences(io.StringIO("ACGT\n"), format='fasta'))
+
+@pytest.mark.parametrize('text, message', [
+    ("@r\nACGT\n+\nIIIII\n", "5 quality scores for 4 bases"),
+    ("@r\nACGT\n+\nII\n", "truncated"),
+    ("@r\nACGT\n", "no + line"),
+    ("@r\nA\n+\nI\nr2\nA\n+\nI\n", "does not start with @")])
+def test_bad_fastq(text, message):
+    with pytest.raises(IOError) as error:
+        list(read_sequences(io.StringIO(text), format='fastq'))
+    assert message in str(error.value)
+
+@pytest.mark.parametrize('width', [None, 3])
+def test_write_fasta_round_trip(width):
+    records = [SequenceRecord('a', 'ACGTACG', None), SequenceRecord('b', 'TT', None)]
+    fo = io.StringIO()
+    write_fasta(records, fo, width=width)
+    fo.seek(0)
+    assert list(read_sequences(fo)) == records